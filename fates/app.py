@@ -210,11 +210,130 @@ async def open_database_connection_pool():
 
 @app.on_event("shutdown")
 async def close_database_connection_pool():
-    """Closes the database connection pool"""
+    """Closes the database connection pool
+
+    The change feed holds a connection, so it is stopped first
+    """
+    mapleshade.changes.stop()
+
     engine = engine_finder()
     await engine.close_connnection_pool()
 
 
+@app.on_event("startup")
+async def start_change_feed():
+    """Starts listening for database change notifications"""
+    mapleshade.changes.start()
+
+
+@app.on_event("startup")
+async def open_silverpelt_session():
+    """Opens the pooled keep-alive Silverpelt session for this worker"""
+    await mapleshade.open_silverpelt()
+
+
+@app.on_event("shutdown")
+async def close_silverpelt_session():
+    """Closes the pooled Silverpelt session"""
+    await mapleshade.close_silverpelt()
+
+
+@app.on_event("startup")
+async def start_cache_listener():
+    """Starts listening for shared cache invalidations from other workers"""
+    mapleshade.cache.start()
+
+
+@app.on_event("shutdown")
+async def stop_cache_listener():
+    """Stops the shared cache invalidation listener"""
+    await mapleshade.cache.stop()
+
+
+@app.on_event("startup")
+async def load_list_meta():
+    """Preloads the tag/feature registry and starts its refresh timer"""
+    await mapleshade.meta.start()
+
+
+@app.on_event("shutdown")
+async def stop_list_meta():
+    """Stops the tag/feature registry refresh timer"""
+    mapleshade.meta.stop()
+
+
+@app.on_event("startup")
+async def start_sanitize_pool():
+    """Starts the sanitizer process pool"""
+    mapleshade.start_sanitize_pool()
+
+
+@app.on_event("shutdown")
+async def stop_sanitize_pool():
+    """Stops the sanitizer process pool"""
+    mapleshade.stop_sanitize_pool()
+
+
+@app.on_event("startup")
+async def load_index_snapshots():
+    """Builds the index snapshots and starts their refresh timer"""
+    await mapleshade.index.start()
+
+
+@app.on_event("shutdown")
+async def stop_index_snapshots():
+    """Stops the index snapshot refresh timer"""
+    mapleshade.index.stop()
+
+
+@app.on_event("startup")
+async def start_random_sampler():
+    """Loads the random bot/server sampler and starts its refresh timer"""
+    await mapleshade.random.start()
+
+
+@app.on_event("shutdown")
+async def stop_random_sampler():
+    """Stops the random bot/server sampler"""
+    mapleshade.random.stop()
+
+
+@app.on_event("startup")
+async def load_suggest_index():
+    """Builds the search suggestion index and starts its refresh timer"""
+    await mapleshade.suggest.start()
+
+
+@app.on_event("shutdown")
+async def stop_suggest_index():
+    """Stops the search suggestion index refresh timer"""
+    mapleshade.suggest.stop()
+
+
+@app.on_event("startup")
+async def load_vanity_map():
+    """Loads the vanity map and starts its reload timer"""
+    await mapleshade.vanity.start()
+
+
+@app.on_event("shutdown")
+async def stop_vanity_map():
+    """Stops the vanity map reload timer"""
+    mapleshade.vanity.stop()
+
+
+@app.on_event("startup")
+async def start_auth_cache():
+    """Checks whether bot tokens can be looked up by digest"""
+    await mapleshade.auth_cache.start()
+
+
+@app.on_event("shutdown")
+async def stop_auth_cache():
+    """Stops rechecking whether bot tokens can be looked up by digest"""
+    mapleshade.auth_cache.stop()
+
+
 # This is the only exception to not using @route
 @app.get("/docs", include_in_schema=False)
 async def docs():
@@ -1,9 +1,8 @@
 from fastapi import Depends, Request
 from fastapi.security.api_key import APIKeyHeader
-from libcommon import enums
 
-from libcommon import tables
 from libcommon.enums import TargetType
+from fates.app import mapleshade
 from .models import AuthData, Response, ResponseCode
 import secrets
 
@@ -31,13 +30,9 @@ async def auth(
 ):
     """Dependency for authorization of a user/bot/server"""
     if compat:
-        auth_data = (
-            await tables.Bots.select(tables.Bots.bot_id)
-            .where(tables.Bots.api_token == compat.replace("Bot ", ""))
-            .first()
-        )
+        bot_id = await mapleshade.auth_cache.fetch_compat(compat.replace("Bot ", ""))
 
-        if not auth_data:
+        if bot_id is None:
             Response(
                 done=False,
                 reason="The specified bot could not be found",
@@ -45,7 +40,7 @@ async def auth(
             ).error(404)
 
         return AuthData(
-            target_id=auth_data["bot_id"],
+            target_id=bot_id,
             auth_type=TargetType.Bot,
             token=compat,
             compat=True,
@@ -69,23 +64,17 @@ async def auth(
             code=ResponseCode.AUTH_FAIL,
         ).error(400)
 
+    # Only token digests are cached, so compare digests
+    digest = mapleshade.auth_cache.digest(token)
+
     if auth_type == "user":
-        if request.url.path in GLOBAL_BANNED_ALLOWED_ROUTES:
-            print("Ignoring global ban for user")
-            auth_data = (
-                await tables.Users.select(tables.Users.api_token)
-                .where(tables.Users.user_id == id)
-                .first()
-            )
-        else:
-            auth_data = (
-                await tables.Users.select(tables.Users.api_token)
-                .where(
-                    tables.Users.user_id == id,
-                    tables.Users.state != enums.UserState.GlobalBan.value,
-                )
-                .first()
-            )
+        auth_data = await mapleshade.auth_cache.fetch(TargetType.User, id)
+
+        if auth_data and auth_data[1]:
+            if request.url.path in GLOBAL_BANNED_ALLOWED_ROUTES:
+                print("Ignoring global ban for user")
+            else:
+                auth_data = None
 
         if not auth_data:
             Response(
@@ -94,7 +83,7 @@ async def auth(
                 code=ResponseCode.NOT_FOUND,
             ).error(404)
 
-        if not secrets.compare_digest(auth_data["api_token"], token):
+        if not secrets.compare_digest(auth_data[0], digest):
             Response(
                 done=False,
                 reason="Invalid Frostpaw-Auth header set [token mismatch]",
@@ -105,11 +94,7 @@ async def auth(
             target_id=id, auth_type=TargetType.User, token=token, compat=False
         )
     elif auth_type == "bot":
-        auth_data = (
-            await tables.Bots.select(tables.Bots.api_token)
-            .where(tables.Bots.bot_id == id)
-            .first()
-        )
+        auth_data = await mapleshade.auth_cache.fetch(TargetType.Bot, id)
 
         if not auth_data:
             Response(
@@ -118,7 +103,7 @@ async def auth(
                 code=ResponseCode.NOT_FOUND,
             ).error(404)
 
-        if not secrets.compare_digest(auth_data["api_token"], token):
+        if not secrets.compare_digest(auth_data[0], digest):
             Response(
                 done=False,
                 reason="Invalid Frostpaw-Auth header set [token mismatch]",
@@ -129,11 +114,7 @@ async def auth(
             target_id=id, auth_type=TargetType.Bot, token=token, compat=False
         )
     elif auth_type == "server":
-        auth_data = (
-            await tables.Servers.select(tables.Servers.api_token)
-            .where(tables.Servers.server_id == id)
-            .first()
-        )
+        auth_data = await mapleshade.auth_cache.fetch(TargetType.Server, id)
 
         if not auth_data:
             Response(
@@ -142,7 +123,7 @@ async def auth(
                 code=ResponseCode.NOT_FOUND,
             ).error(404)
 
-        if not secrets.compare_digest(auth_data["api_token"], token):
+        if not secrets.compare_digest(auth_data[0], digest):
             Response(
                 done=False,
                 reason="Invalid Frostpaw-Auth header set [token mismatch]",
@@ -0,0 +1,212 @@
+"""
+Benchmark of the queries ``Mapleshade.bot`` runs for a bot page, against a mocked pool
+and Silverpelt (no database or discord connection needed, only config.yaml)
+
+Every pool checkout and every query waits ``latency`` ms to stand in for a round trip
+to postgres, and every Silverpelt batch waits the same. The page assembly from before
+the fixed-query rewrite (one ORM query per table, tag and feature, each on its own
+connection, with Silverpelt called in between) is replayed against the same mocks
+
+Run with ``python3 -m fates.bench_bot [tags] [features] [latency ms] [runs]``
+"""
+import asyncio
+import contextlib
+import re
+import sys
+import time
+from datetime import datetime
+from typing import Any
+
+from fates import models
+from fates.mapleshade import Mapleshade
+
+BOT_ID = 811073947382579200
+OWNER_IDS = (563808552288780322, 728871946456137770)
+
+
+class MockPool:
+    """asyncpg pool stand-in that counts checkouts and round trips"""
+
+    def __init__(self, rows: dict[str, list[dict]], latency: float):
+        self.rows = rows  # Table -> rows returned by any query on it
+        self.latency = latency
+        self.acquisitions = 0
+        self.round_trips = 0
+
+    @contextlib.asynccontextmanager
+    async def acquire(self):
+        """Checks out a (mock) connection, which is the pool itself"""
+        self.acquisitions += 1
+        await asyncio.sleep(self.latency)
+        yield self
+
+    async def fetch(self, sql: str, *_: Any) -> list[dict]:
+        """Returns the rows of the table the query selects from"""
+        self.round_trips += 1
+        await asyncio.sleep(self.latency)
+        return self.rows[re.search(r"FROM (\w+)", sql).group(1)]
+
+    async def fetchrow(self, sql: str, *args: Any) -> dict | None:
+        """Returns the first row of the table the query selects from"""
+        rows = await self.fetch(sql, *args)
+        return rows[0] if rows else None
+
+
+class MockUsers:
+    """Silverpelt user loader stand-in, one round trip per batch"""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.batches = 0
+
+    async def load_many(self, user_ids: list[int]) -> dict[int, dict]:
+        """Returns a fake user for every ID"""
+        self.batches += 1
+        await asyncio.sleep(self.latency)
+        return {
+            id: {
+                "id": str(id),
+                "username": f"user{id % 1000}",
+                "disc": "0000",
+                "avatar": "",
+                "bot": id == BOT_ID,
+                "system": False,
+                "status": 0,
+                "flags": 0,
+            }
+            for id in user_ids
+        }
+
+
+def make_rows(tags: list[str], features: list[str]) -> dict[str, list[dict]]:
+    """Returns the rows of a bot page with the given tags and features"""
+    now = datetime.now()
+
+    bot = {
+        "bot_id": BOT_ID,
+        "tags": tags,
+        "extra_links": '{"Website": "https://fateslist.xyz"}',
+        "votes": 1200,
+        "guild_count": 5400,
+        "shard_count": 6,
+        "library": "discord.py",
+        "webhook": "",
+        "description": "A bot used to benchmark the bot page",
+        "long_description": "# Benchmark bot\n\n" + "Some **markdown** text.\n\n" * 20,
+        "prefix": "!",
+        "banner_card": "",
+        "created_at": now,
+        "invite": "",
+        "features": features,
+        "invite_amount": 0,
+        "user_count": 0,
+        "css": "",
+        "shards": [],
+        "username_cached": "benchbot",
+        "state": models.BotServerState.Approved.value,
+        "long_description_type": models.LongDescriptionType.MarkdownServerSide.value,
+        "verifier": 0,
+        "last_stats_post": now,
+        "webhook_type": 0,
+        "api_token": "",
+        "webhook_secret": "",
+        "banner_page": "",
+        "total_votes": 1200,
+        "client_id": BOT_ID,
+        "flags": [],
+        "uptime_checks_total": 0,
+        "uptime_checks_failed": 0,
+        "page_style": 0,
+        "webhook_hmac_only": False,
+        "last_updated_at": now,
+    }
+
+    return {
+        "bots": [bot],
+        "bot_owner": [
+            {"owner": owner, "main": i == 0} for i, owner in enumerate(OWNER_IDS)
+        ],
+        "user_bot_logs": [],
+        "bot_commands": [],
+        "bot_list_tags": [{"id": tag, "icon": "fa:tag"} for tag in tags[:1]],
+        "features": [
+            {"id": feature, "name": feature, "viewed_as": "", "description": ""}
+            for feature in features[:1]
+        ],
+    }
+
+
+async def old_bot(pool: MockPool, users: MockUsers, bot: dict):
+    """Replays the queries of ``Mapleshade.bot`` before the fixed-query rewrite"""
+
+    async def query(table: str) -> list[dict]:
+        """One ORM query, which checks out its own connection"""
+        async with pool.acquire() as conn:
+            return await conn.fetch(f"SELECT * FROM {table}")
+
+    await query("bots")
+    owners = await query("bot_owner")
+    await users.load_many([BOT_ID] + [owner["owner"] for owner in owners])
+    await query("user_bot_logs")
+
+    for _ in bot["tags"]:
+        await query("bot_list_tags")
+
+    for _ in bot["features"]:
+        await query("features")
+
+    await query("bot_commands")
+
+
+async def run(name: str, fn, pool: MockPool, users: MockUsers, runs: int):
+    """Runs ``fn`` ``runs`` times and prints the round trips and time per run"""
+    pool.acquisitions = pool.round_trips = users.batches = 0
+    start = time.perf_counter()
+
+    for _ in range(runs):
+        await fn()
+
+    elapsed = (time.perf_counter() - start) / runs * 1e3
+    print(
+        f"{name}: {pool.acquisitions / runs:.0f} checkouts, "
+        f"{pool.round_trips / runs:.0f} queries, "
+        f"{users.batches / runs:.0f} silverpelt batches, {elapsed:.2f}ms"
+    )
+
+
+async def main(tag_count: int, feature_count: int, latency: float, runs: int):
+    """Benchmarks the old and the current bot page assembly"""
+    tags = [f"tag_{i}" for i in range(tag_count)]
+    features = [f"feature_{i}" for i in range(feature_count)]
+    rows = make_rows(tags, features)
+
+    pool = MockPool(rows, latency)
+    users = MockUsers(latency)
+
+    mapleshade = Mapleshade()
+    mapleshade.pool = pool
+    mapleshade.users = users
+    mapleshade.meta.bot_tags = {
+        tag: models.Tag(id=tag, iconify_data="fa:tag", name=tag) for tag in tags
+    }
+    mapleshade.meta.features = {
+        feature: models.Feature(id=feature, name=feature, viewed_as="", description="")
+        for feature in features
+    }
+
+    print(f"{tag_count} tags, {feature_count} features, {latency * 1e3:.1f}ms latency")
+    await run(
+        "before", lambda: old_bot(pool, users, rows["bots"][0]), pool, users, runs
+    )
+    await run("after", lambda: mapleshade.bot(BOT_ID), pool, users, runs)
+
+
+if __name__ == "__main__":
+    asyncio.run(
+        main(
+            int(sys.argv[1]) if len(sys.argv) > 1 else 5,
+            int(sys.argv[2]) if len(sys.argv) > 2 else 3,
+            float(sys.argv[3]) / 1e3 if len(sys.argv) > 3 else 0.5e-3,
+            int(sys.argv[4]) if len(sys.argv) > 4 else 200,
+        )
+    )
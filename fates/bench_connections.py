@@ -0,0 +1,102 @@
+"""
+Load test of the preview websocket ``ConnectionManager`` with thousands of idle mock
+sockets (no app, database or real websockets needed)
+
+Most sockets never PING and must be evicted, the rest PING halfway through their
+deadline and must survive. Sweeps with nothing due are compared against the old
+scan over every socket
+
+Run with ``python3 -m fates.bench_connections [sockets] [pinging sockets]``
+"""
+import asyncio
+import sys
+import time
+
+from fates.connections import ConnectionManager
+
+# PING timeout used for the test (seconds), shorter than the real one to keep it quick
+TIMEOUT = 1
+
+
+class MockWebSocket:
+    """Websocket stand-in that records whether it was closed"""
+
+    __slots__ = ("last_ping", "closed")
+
+    def __init__(self):
+        self.last_ping = time.time()  # Only used by the old scan
+        self.closed = False
+
+    async def accept(self):
+        """Accepts the (mock) connection"""
+
+    async def close(self, code: int, reason: str):
+        """Closes the (mock) connection"""
+        self.closed = True
+
+
+def old_scan(sockets: list[MockWebSocket]) -> list[MockWebSocket]:
+    """Old sweep: every socket is checked on every pass"""
+    now = time.time()
+    return [ws for ws in sockets if now - ws.last_ping > TIMEOUT]
+
+
+async def timed(name: str, coro) -> float:
+    """Awaits ``coro``, printing and returning how long it took"""
+    start = time.perf_counter()
+    ret = await coro
+    print(f"{name}: {(time.perf_counter() - start) * 1e3:.3f}ms")
+    return ret
+
+
+async def main(count: int, pinging: int):
+    """Connects ``count`` sockets, keeps ``pinging`` of them alive and sweeps"""
+    # Sweeps are run by hand below so they can be timed
+    manager = ConnectionManager(timeout=TIMEOUT, interval=60 * 60)
+    sockets = [MockWebSocket() for _ in range(count)]
+
+    async def connect_all():
+        """Connects every socket"""
+        for ws in sockets:
+            await manager.connect(ws)
+
+    await timed(f"connect {count} sockets", connect_all())
+
+    # Nothing is due yet, so only the top of the heap is looked at
+    await timed("sweep, nothing due", manager.expire())
+    start = time.perf_counter()
+    for _ in range(10):
+        old_scan(sockets)
+    print(f"old scan, nothing due: {(time.perf_counter() - start) * 1e2:.3f}ms")
+
+    await asyncio.sleep(TIMEOUT / 2)
+
+    for ws in sockets[:pinging]:
+        manager.ping(ws)
+
+    await asyncio.sleep(TIMEOUT / 2 + 0.1)
+
+    evicted = await timed("sweep, idle sockets due", manager.expire())
+    closed = sum(ws.closed for ws in sockets)
+
+    print(f"evicted {evicted}, closed {closed}, {len(manager.heap)} left in the heap")
+    print(f"stats: {manager.stats}")
+
+    assert evicted == closed == count - pinging
+    assert not any(ws.closed for ws in sockets[:pinging])
+    assert manager.stats["connections"] == len(manager.heap) == pinging
+
+    # The pinged sockets were rescheduled and are now due as well
+    await asyncio.sleep(TIMEOUT / 2)
+    evicted = await timed("sweep, pinged sockets due", manager.expire())
+
+    assert evicted == pinging and not manager.deadlines and not manager.heap
+
+
+if __name__ == "__main__":
+    asyncio.run(
+        main(
+            int(sys.argv[1]) if len(sys.argv) > 1 else 5000,
+            int(sys.argv[2]) if len(sys.argv) > 2 else 100,
+        )
+    )
@@ -0,0 +1,276 @@
+"""
+Benchmark of pack search and pack resolution against generated data, seeded into a
+scratch ``bench_packs`` schema of the given database which is dropped afterwards
+
+The pack search from before it filtered bot_packs directly (every pack's bots unnested
+and joined to bots and users, then DISTINCT) and the current ``search_packs.sql`` are
+timed for a pack name, an owner name, a member bot name, a miss, an owner ID and a
+member bot ID. Both are timed without and then with the indexes of the kitehelper
+migrations (the trigram ones need pg_trgm and are skipped without it). Resolving a page
+of packs is timed with one description query per member (as before) and with the bulk
+query of ``Mapleshade.resolve_packs``
+
+Run with ``python3 -m fates.bench_packs [dsn] [packs] [runs]`` (without a DSN the
+usual PG* environment variables are used)
+"""
+import asyncio
+import random
+import statistics
+import string
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+
+import asyncpg
+
+from fates.mapleshade import Mapleshade, SQLFiles
+
+SCHEMA = "bench_packs"
+
+# Pack search before it filtered bot_packs directly
+OLD_SEARCH_PACKS = """
+SELECT DISTINCT bot_packs.id, bot_packs.icon, bot_packs.banner,
+bot_packs.created_at, bot_packs.owner, bot_packs.bots,
+bot_packs.description, bot_packs.name FROM (
+    SELECT id, icon, banner,
+    created_at, owner, bots,
+    description, name, unnest(bots) AS bot_id FROM bot_packs
+) bot_packs
+INNER JOIN bots ON bots.bot_id = bot_packs.bot_id
+INNER JOIN users ON users.user_id = bot_packs.owner
+WHERE bot_packs.name ilike $1 OR bot_packs.owner = $2
+OR users.username ilike $1 OR bots.bot_id = $2
+OR bots.username_cached ilike $1
+"""
+
+# Columns of users, bots and bot_packs the pack search and resolution use
+TABLES = f"""
+CREATE SCHEMA {SCHEMA};
+CREATE TABLE {SCHEMA}.users (
+    user_id BIGINT PRIMARY KEY,
+    username TEXT NOT NULL
+);
+CREATE TABLE {SCHEMA}.bots (
+    bot_id BIGINT PRIMARY KEY,
+    username_cached TEXT NOT NULL,
+    description TEXT NOT NULL
+);
+CREATE TABLE {SCHEMA}.bot_packs (
+    id UUID PRIMARY KEY,
+    icon TEXT NOT NULL,
+    banner TEXT NOT NULL,
+    created_at TIMESTAMPTZ NOT NULL,
+    owner BIGINT NOT NULL,
+    bots BIGINT[] NOT NULL,
+    description TEXT NOT NULL,
+    name TEXT NOT NULL
+);
+"""
+
+# Indexes of the "Bot pack members index for search" migration
+MEMBERS_INDEX = f"""
+CREATE INDEX bot_packs_bots_idx ON {SCHEMA}.bot_packs USING GIN (bots);
+CREATE INDEX bot_packs_owner_idx ON {SCHEMA}.bot_packs (owner);
+"""
+
+# Indexes of the "Trigram indexes for search" migration that the pack search uses
+TRGM_INDEXES = f"""
+CREATE INDEX bot_packs_name_trgm_idx ON {SCHEMA}.bot_packs
+    USING GIN (name gin_trgm_ops);
+CREATE INDEX users_username_trgm_idx ON {SCHEMA}.users
+    USING GIN (username gin_trgm_ops);
+CREATE INDEX bots_username_cached_trgm_idx ON {SCHEMA}.bots
+    USING GIN (username_cached gin_trgm_ops);
+"""
+
+USER_BASE = 3 * 10**17
+BOT_BASE = 10**17
+
+
+def make_name() -> str:
+    """Returns a made up name"""
+    return "".join(random.choices(string.ascii_lowercase, k=random.randint(5, 10)))
+
+
+def make_data(packs: int) -> tuple[list[tuple], list[tuple], list[tuple]]:
+    """Returns users, bots (ten per pack) and packs of 2 to 10 bots each"""
+    now = datetime.now()
+
+    users = [(USER_BASE + i, make_name()) for i in range(packs * 2)]
+    bots = [
+        (BOT_BASE + i, make_name(), "A bot made for the pack benchmark")
+        for i in range(packs * 10)
+    ]
+
+    rows = [
+        (
+            uuid.uuid4(),
+            "",
+            "",
+            now - timedelta(minutes=i),
+            random.choice(users)[0],
+            [bot[0] for bot in random.sample(bots, random.randint(2, 10))],
+            "A pack made for the pack benchmark",
+            make_name() + " pack",
+        )
+        for i in range(packs)
+    ]
+
+    return users, bots, rows
+
+
+async def timed(pool: asyncpg.Pool, runs: int, fn, *args) -> tuple:
+    """Awaits ``fn(*args)`` ``runs`` times, returns its result and median time (ms)"""
+    times = []
+
+    for _ in range(runs):
+        start = time.perf_counter()
+        ret = await fn(*args)
+        times.append((time.perf_counter() - start) * 1e3)
+
+    return ret, statistics.median(times)
+
+
+async def search(pool: asyncpg.Pool, terms: dict[str, str], runs: int):
+    """Times the old and the current pack search for every term"""
+    search_packs = SQLFiles().search_packs
+
+    for name, term in terms.items():
+        args = (f"%{term}%", Mapleshade.search_id(term))
+
+        old_rows, old_time = await timed(
+            pool, runs, pool.fetch, OLD_SEARCH_PACKS, *args
+        )
+        rows, new_time = await timed(pool, runs, pool.fetch, search_packs, *args)
+
+        # The old search returned every match, the current one the newest 6
+        old_ids = {row["id"] for row in old_rows}
+        assert {row["id"] for row in rows} <= old_ids, name
+        assert len(rows) == min(len(old_ids), 6), name
+
+        print(
+            f"  {name} ({term}): {len(old_ids)} matches, "
+            f"before {old_time:.2f}ms, after {new_time:.2f}ms"
+        )
+
+
+async def resolve(pool: asyncpg.Pool, packs: list[dict], runs: int):
+    """Times resolving a page of packs with per member and with bulk descriptions"""
+    mapleshade = Mapleshade()
+    mapleshade.pool = pool
+
+    user_ids = {bot for pack in packs for bot in pack["bots"]}
+    user_ids |= {pack["owner"] for pack in packs}
+    users = {
+        id: {
+            "id": str(id),
+            "username": f"user{id % 1000}",
+            "disc": "0000",
+            "avatar": "",
+            "bot": id < USER_BASE,
+            "system": False,
+            "status": 0,
+            "flags": 0,
+        }
+        for id in user_ids
+    }
+
+    async def old_resolve():
+        """Member descriptions as they were loaded before, one query per member"""
+        for pack in packs:
+            for bot in pack["bots"]:
+                await pool.fetchrow(
+                    "SELECT description FROM bots WHERE bot_id = $1", bot
+                )
+
+    async def new_resolve():
+        """Member descriptions as ``Mapleshade.resolve_packs`` loads them"""
+        resolved = await mapleshade.resolve_packs(
+            [dict(pack) for pack in packs], users=users
+        )
+        assert sum(len(pack.resolved_bots) for pack in resolved) == len(
+            [bot for pack in packs for bot in pack["bots"]]
+        )
+
+    members = sum(len(pack["bots"]) for pack in packs)
+
+    _, old_time = await timed(pool, runs, old_resolve)
+    _, new_time = await timed(pool, runs, new_resolve)
+
+    print(
+        f"resolve {len(packs)} packs ({members} members): "
+        f"before {old_time:.2f}ms, after {new_time:.2f}ms"
+    )
+
+
+async def main(dsn: str | None, count: int, runs: int):
+    """Seeds the scratch schema and benchmarks pack search and resolution"""
+    pool = await asyncpg.create_pool(
+        dsn, server_settings={"search_path": f"{SCHEMA}, public"}
+    )
+
+    try:
+        trgm = True
+        try:
+            await pool.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        except asyncpg.PostgresError as exc:
+            trgm = False
+            print(f"pg_trgm is not available ({exc}), skipping the trigram indexes")
+
+        await pool.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+        await pool.execute(TABLES)
+
+        users, bots, packs = make_data(count)
+
+        start = time.perf_counter()
+        async with pool.acquire() as conn:
+            for table, records in (
+                ("users", users),
+                ("bots", bots),
+                ("bot_packs", packs),
+            ):
+                await conn.copy_records_to_table(
+                    table, records=records, schema_name=SCHEMA
+                )
+        await pool.execute(f"ANALYZE {SCHEMA}.users, {SCHEMA}.bots, {SCHEMA}.bot_packs")
+        print(
+            f"seeded {count} packs, {len(bots)} bots and {len(users)} users: "
+            f"{time.perf_counter() - start:.2f}s"
+        )
+
+        # Terms are picked from the oldest packs so they are not on the first page
+        pack = packs[-1]
+        terms = {
+            "pack name": pack[7].split()[0],
+            "owner name": dict(users)[pack[4]],
+            "member name": dict((bot[0], bot[1]) for bot in bots)[pack[5][0]],
+            "miss": "qqqqqq",
+            "owner ID": str(pack[4]),
+            "member ID": str(pack[5][0]),
+        }
+
+        print("without search indexes")
+        await search(pool, terms, runs)
+
+        await pool.execute(MEMBERS_INDEX + (TRGM_INDEXES if trgm else ""))
+        await pool.execute(f"ANALYZE {SCHEMA}.users, {SCHEMA}.bots, {SCHEMA}.bot_packs")
+
+        print("with search indexes" + ("" if trgm else " (no trigram indexes)"))
+        await search(pool, terms, runs)
+
+        page = await pool.fetch(SQLFiles().search_packs, "%pack%", -1)
+        await resolve(pool, page, runs)
+    finally:
+        await pool.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+        await pool.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(
+        main(
+            sys.argv[1] if len(sys.argv) > 1 else None,
+            int(sys.argv[2]) if len(sys.argv) > 2 else 10_000,
+            int(sys.argv[3]) if len(sys.argv) > 3 else 5,
+        )
+    )
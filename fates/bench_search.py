@@ -0,0 +1,253 @@
+"""
+Benchmark of the bot search against generated data (100k bots by default), seeded into
+a scratch ``bench_search`` schema of the given database which is dropped afterwards
+
+The search before the pg_trgm rewrite (a join on bot_owner plus DISTINCT and an
+``owner::text ilike``) and the current ``search_bots.sql`` are timed for a common word,
+a rare word, a miss and an owner ID. Both are timed without and then with the trigram
+indexes of the kitehelper migration, and relevance sorting is timed as well (pg_trgm
+is needed for the indexes and for relevance, without it only the first part runs)
+
+Run with ``python3 -m fates.bench_search [dsn] [bots] [runs]`` (without a DSN the
+usual PG* environment variables are used)
+"""
+import asyncio
+import random
+import statistics
+import string
+import sys
+import time
+from datetime import datetime
+
+import asyncpg
+
+from fates import models
+from fates.mapleshade import Mapleshade, SQLFiles
+
+SCHEMA = "bench_search"
+
+# Bot search before the pg_trgm rewrite
+OLD_SEARCH_BOTS = """
+SELECT DISTINCT bots.bot_id, bots.created_at, bots.description, bots.banner_card, bots.state,
+bots.votes, bots.flags, bots.guild_count FROM bots
+INNER JOIN bot_owner ON bots.bot_id = bot_owner.bot_id
+WHERE (bots.description ilike $1
+OR bots.long_description ilike $1
+OR bots.username_cached ilike $1
+OR bot_owner.owner::text ilike $1)
+AND (bots.state = $2 OR bots.state = $3)
+AND (cardinality($4::text[]) = 0 OR bots.tags @> $4)
+AND (bots.guild_count >= $5)
+AND (($6 = -1::bigint) OR (bots.guild_count <= $6))
+AND (bots.votes >= $7)
+AND (($8 = -1::bigint) OR (bots.votes <= $8))
+ORDER BY bots.votes DESC, bots.guild_count DESC LIMIT 6
+"""
+
+# Columns of bots and bot_owner the search uses (plus the index bot_owner already has)
+TABLES = f"""
+CREATE SCHEMA {SCHEMA};
+CREATE TABLE {SCHEMA}.bots (
+    bot_id BIGINT PRIMARY KEY,
+    created_at TIMESTAMPTZ NOT NULL,
+    description TEXT NOT NULL,
+    long_description TEXT NOT NULL,
+    username_cached TEXT NOT NULL,
+    banner_card TEXT NOT NULL,
+    state INTEGER NOT NULL,
+    votes BIGINT NOT NULL,
+    flags INTEGER[] NOT NULL,
+    guild_count BIGINT NOT NULL,
+    tags TEXT[] NOT NULL
+);
+CREATE TABLE {SCHEMA}.bot_owner (
+    bot_id BIGINT NOT NULL,
+    owner BIGINT NOT NULL,
+    main BOOLEAN NOT NULL
+);
+CREATE INDEX bot_owner_bot_id_idx ON {SCHEMA}.bot_owner (bot_id);
+"""
+
+# Indexes of the "Trigram indexes for search" migration that the bot search uses
+INDEXES = f"""
+CREATE INDEX bots_description_trgm_idx ON {SCHEMA}.bots
+    USING GIN (description gin_trgm_ops);
+CREATE INDEX bots_long_description_trgm_idx ON {SCHEMA}.bots
+    USING GIN (long_description gin_trgm_ops);
+CREATE INDEX bots_username_cached_trgm_idx ON {SCHEMA}.bots
+    USING GIN (username_cached gin_trgm_ops);
+CREATE INDEX bot_owner_owner_idx ON {SCHEMA}.bot_owner (owner);
+ANALYZE {SCHEMA}.bots;
+ANALYZE {SCHEMA}.bot_owner;
+"""
+
+STATES = [state.value for state in models.BotServerState]
+
+
+def make_words(count: int) -> list[str]:
+    """Returns ``count`` made up words"""
+    return [
+        "".join(random.choices(string.ascii_lowercase, k=random.randint(4, 10)))
+        for _ in range(count)
+    ]
+
+
+def make_bots(count: int, words: list[str]) -> tuple[list[tuple], list[tuple]]:
+    """
+    Returns ``count`` bot rows and their owners. Words are picked with a skewed
+    distribution so that some are common and some are rare. Votes are unique so both
+    searches have the same order
+    """
+    weights = [1 / (i + 1) for i in range(len(words))]
+    now = datetime.now()
+    votes = random.sample(range(count * 10), count)
+
+    bots, owners = [], []
+
+    for i in range(count):
+        bot_id = 10**17 + i
+        bots.append(
+            (
+                bot_id,
+                now,
+                " ".join(random.choices(words, weights, k=10)),
+                " ".join(random.choices(words, weights, k=80)),
+                "".join(random.choices(words, k=2)),
+                "",
+                random.choice(STATES),
+                votes[i],
+                [],
+                random.randrange(100_000),
+                [],
+            )
+        )
+
+        for n in range(random.choice((1, 1, 2))):
+            owners.append((bot_id, 5 * 10**17 + random.randrange(count // 2), n == 0))
+
+    return bots, owners
+
+
+def search_args(query: models.SearchQuery) -> list:
+    """Returns the arguments ``Mapleshade.search`` passes to the bot search"""
+    return [
+        f"%{query.query}%",
+        models.BotServerState.Approved,
+        models.BotServerState.Certified,
+        query.tags.bot,
+        *query.guild_count,
+        *query.votes,
+        Mapleshade.search_id(query.query),
+    ]
+
+
+async def timed(conn: asyncpg.Connection, runs: int, sql: str, *args) -> list:
+    """Runs a query ``runs`` times, returning its rows and the median time (ms)"""
+    times = []
+
+    for _ in range(runs):
+        start = time.perf_counter()
+        rows = await conn.fetch(sql, *args)
+        times.append((time.perf_counter() - start) * 1e3)
+
+    return rows, statistics.median(times)
+
+
+async def run(conn: asyncpg.Connection, terms: dict[str, str], runs: int, trgm: bool):
+    """Times the old and the current bot search for every term"""
+    search_bots = SQLFiles().search_bots
+
+    for name, term in terms.items():
+        query = models.SearchQuery(query=term)
+
+        args = search_args(query)
+        sql = Mapleshade.search_sql(
+            search_bots, query, "bots", "bot_id", "username_cached", "@>", None, args
+        )
+
+        old_rows, old_time = await timed(conn, runs, OLD_SEARCH_BOTS, *args[:8])
+        rows, new_time = await timed(conn, runs, sql, *args)
+
+        # The owner ID only matches by text (as a substring) in the old search
+        if name != "owner":
+            old_ids = [row["bot_id"] for row in old_rows]
+            assert old_ids == [row["bot_id"] for row in rows[:6]], name
+
+        line = f"  {name} ({term}): before {old_time:.2f}ms, after {new_time:.2f}ms"
+
+        if trgm:
+            relevance = models.SearchQuery(query=term, sort="relevance")
+
+            args = search_args(relevance)
+            sql = Mapleshade.search_sql(
+                search_bots,
+                relevance,
+                "bots",
+                "bot_id",
+                "username_cached",
+                "@>",
+                None,
+                args,
+            )
+
+            _, relevance_time = await timed(conn, runs, sql, *args)
+            line += f", relevance {relevance_time:.2f}ms"
+
+        print(line)
+
+
+async def main(dsn: str | None, count: int, runs: int):
+    """Seeds the scratch schema and benchmarks the bot search"""
+    conn = await asyncpg.connect(dsn)
+
+    try:
+        trgm = True
+        try:
+            await conn.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        except asyncpg.PostgresError as exc:
+            trgm = False
+            print(f"pg_trgm is not available ({exc}), only timing without indexes")
+
+        await conn.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+        await conn.execute(TABLES)
+        await conn.execute(f"SET search_path TO {SCHEMA}, public")
+
+        words = make_words(5000)
+        bots, owners = make_bots(count, words)
+
+        start = time.perf_counter()
+        await conn.copy_records_to_table("bots", records=bots, schema_name=SCHEMA)
+        await conn.copy_records_to_table(
+            "bot_owner", records=owners, schema_name=SCHEMA
+        )
+        await conn.execute(f"ANALYZE {SCHEMA}.bots; ANALYZE {SCHEMA}.bot_owner")
+        print(f"seeded {count} bots: {time.perf_counter() - start:.2f}s")
+
+        terms = {
+            "common word": words[0],
+            "rare word": words[-1],
+            "miss": "qqqqqq",
+            "owner": str(owners[0][1]),
+        }
+
+        print("without trigram indexes")
+        await run(conn, terms, runs, False)
+
+        if trgm:
+            start = time.perf_counter()
+            await conn.execute(INDEXES)
+            print(f"with trigram indexes ({time.perf_counter() - start:.2f}s to build)")
+            await run(conn, terms, runs, True)
+    finally:
+        await conn.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+        await conn.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(
+        main(
+            sys.argv[1] if len(sys.argv) > 1 else None,
+            int(sys.argv[2]) if len(sys.argv) > 2 else 100_000,
+            int(sys.argv[3]) if len(sys.argv) > 3 else 5,
+        )
+    )
@@ -0,0 +1,105 @@
+"""
+Websocket liveness tracking for ``/ws/preview``. This is kept free of the app (sockets
+only need ``accept`` and ``close``) so it can be load tested with mock sockets
+"""
+import asyncio
+import heapq
+import itertools
+import time
+from typing import Any
+
+# Seconds without a PING before a websocket is disconnected
+PING_TIMEOUT = 45
+
+# How often expired websockets are looked for (seconds)
+PING_CHECK_INTERVAL = 5
+
+
+class ConnectionManager:
+    """
+    Represents a connection manager which handles connections of a client and disconnecting unresponsive clients
+
+    Connections are kept in a dict of deadlines plus a heap ordered by deadline. A PING only moves the
+    deadline in the dict, stale heap entries are pushed back with the real deadline when they reach the
+    top so expiry costs O(expired) rather than O(all connections)
+    """
+
+    def __init__(
+        self,
+        timeout: int | float = PING_TIMEOUT,
+        interval: int | float = PING_CHECK_INTERVAL,
+    ):
+        self.timeout = timeout
+        self.interval = interval
+        self.deadlines: dict[Any, float] = {}
+        self.heap: list[tuple[float, int, Any]] = []
+        self.seq = itertools.count()  # Tie breaker as websockets are not orderable
+        self.stats: dict[str, int] = {
+            "connections": 0,
+            "peak_connections": 0,
+            "evicted": 0,
+            "disconnected": 0,
+        }
+
+        asyncio.create_task(self._check_ping())
+
+    async def expire(self) -> int:
+        """Disconnects websockets whose PING deadline has passed, returns how many were"""
+        now = time.time()
+        evicted = 0
+
+        while self.heap and self.heap[0][0] <= now:
+            deadline, _, ws = heapq.heappop(self.heap)
+
+            current = self.deadlines.get(ws)
+
+            if current is None:
+                # Already disconnected
+                continue
+            elif current > deadline:
+                # Pinged since this entry was pushed, reschedule with the real deadline
+                heapq.heappush(self.heap, (current, next(self.seq), ws))
+                continue
+
+            evicted += 1
+            self.stats["evicted"] += 1
+            await self.disconnect(ws, "Ping timeout")
+
+        return evicted
+
+    async def _check_ping(self):
+        """Looks for expired websockets every ``interval`` seconds"""
+        while True:
+            await self.expire()
+            await asyncio.sleep(self.interval)
+
+    async def connect(self, ws: Any):
+        """Connects a websocket and adds it to the connection manager thus adding it to PING checks"""
+        await ws.accept()
+
+        deadline = time.time() + self.timeout
+        self.deadlines[ws] = deadline
+        heapq.heappush(self.heap, (deadline, next(self.seq), ws))
+
+        self.stats["connections"] = len(self.deadlines)
+        self.stats["peak_connections"] = max(
+            self.stats["peak_connections"], self.stats["connections"]
+        )
+
+    def ping(self, ws: Any):
+        """Pushes back the PING deadline of a websocket"""
+        if ws in self.deadlines:
+            self.deadlines[ws] = time.time() + self.timeout
+
+    async def disconnect(self, ws: Any, reason: str = "Unknown"):
+        """Disconnects a websocket and removes it from the connection manager thus removing it from PING checks"""
+        if self.deadlines.pop(ws, None) is None:
+            return
+
+        self.stats["connections"] = len(self.deadlines)
+        self.stats["disconnected"] += 1
+
+        try:
+            await ws.close(4000, reason)
+        except:
+            pass
@@ -1,23 +1,157 @@
 """The Mapleshade class contains a set of common primitives for the Fates List backend"""
-from datetime import datetime
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timedelta
+import asyncio
+import bisect
+import enum
+import functools
+import hashlib
+import multiprocessing
 import random
+import secrets
 import string
-from typing import Any, Optional, Tuple
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Optional, Tuple
 
 from pydantic import BaseModel
-from fates import models
+from fates import models, sanitizer
 from ruamel.yaml import YAML
 import orjson
 import bleach
-import cmarkgfm
 import msgpack
 import aiohttp
+import aioredis
 from cmarkgfm.cmark import Options as cmarkgfmOptions
 from maplecache import *
 import pytz
 import asyncpg
+import silverpelt.types.types as silver_types
 
 from libcommon import tables, config, yaml
+from libcommon.storage import (
+    CACHE_INVALIDATE_CHANNEL,
+    CACHE_KEY_PREFIX,
+    PERMS_CACHE_PREFIX,
+    redis_from_config,
+)
+
+# Silverpelt connection settings (one pooled keep-alive session per worker)
+SILVERPELT_URL = "http://127.0.0.1:3030"
+SILVERPELT_POOL_SIZE = 64
+SILVERPELT_KEEPALIVE = 30
+SILVERPELT_TIMEOUT = aiohttp.ClientTimeout(total=10, connect=2)
+
+# How often the tag/feature registry is reloaded from the database (seconds)
+LIST_META_REFRESH_INTERVAL = 60 * 5
+
+# Bump this whenever the sanitizer config (tags, attributes, cmark options) changes
+# so that stale renders are never served from the sanitize cache
+SANITIZER_VERSION = 1
+
+# Byte budget of the sanitized HTML cache
+SANITIZE_CACHE_BUDGET = 64 * 1024 * 1024
+
+# Sources shorter than this (in characters) are sanitized inline on the event loop,
+# anything longer is sent to the sanitizer process pool
+SANITIZE_INLINE_THRESHOLD = 16 * 1024
+
+# Number of sanitizer worker processes per API worker
+SANITIZE_WORKERS = 2
+
+# How often the bot/server index snapshots are rebuilt (seconds)
+INDEX_REFRESH_INTERVAL = 30
+
+# How long a worker may take to rebuild an index before another worker takes over
+# (seconds)
+INDEX_BUILD_TIMEOUT = 10
+
+# How often workers look for an index another worker is rebuilding (seconds)
+INDEX_POLL_INTERVAL = 1
+
+# Postgres channel a trigger notifies with "{target type}:{id}" whenever a bot or server
+# is listed, delisted, voted for, renamed or deleted (see the kitehelper migrations)
+LISTING_CHANGES_CHANNEL = "listing_changes"
+
+# Postgres channel a trigger notifies with "{target type}:{id}" whenever the API token
+# of a user, bot or server or the state of a user (a global ban) changes, or one is
+# deleted (see the kitehelper migrations)
+AUTH_CHANGES_CHANNEL = "auth_changes"
+
+# Database notifications are collected for this long before they are handled (seconds)
+CHANGE_FEED_DELAY = 1
+
+# How often the random sampler syncs bot changes and reloads everything (seconds). This
+# is a fallback, changes are normally applied from the change feed right away
+RANDOM_SYNC_INTERVAL = 60
+RANDOM_RELOAD_INTERVAL = 60 * 10
+
+# Bot changes are synced from a little before the newest ``last_updated_at`` seen, as a
+# transaction that commits late carries an older timestamp. Reapplying a change is harmless
+CHANGE_SYNC_OVERLAP = timedelta(minutes=2)
+
+# Number of random snippets kept resolved ahead of time per target type
+RANDOM_PREFILL = 8
+
+# How often the search suggestion index syncs bot changes and is rebuilt (seconds). This
+# is a fallback, bot and server changes are normally applied from the change feed
+SUGGEST_SYNC_INTERVAL = 60
+SUGGEST_RELOAD_INTERVAL = 60 * 10
+
+# Max number of prefix matches looked at (and then ranked) per suggestion lookup
+SUGGEST_SCAN = 100
+
+# Suggestion index changes touching more keys than this are applied by filtering and
+# re-sorting the whole array once. Smaller ones insert/delete each key with bisect,
+# which moves the tail of the array every time but in C, and is cheaper up to about
+# this many keys
+SUGGEST_REBUILD_KEYS = 2000
+
+# Search results are cached per worker for this long (seconds), the GET variant of
+# /search also sends this as its max-age
+SEARCH_CACHE_TTL = 60
+SEARCH_CACHE_SIZE = 1024
+
+# How often the vanity map is fully reloaded (seconds). Changes made through the API
+# are applied right away, this only picks up changes made elsewhere
+VANITY_RELOAD_INTERVAL = 60 * 10
+
+# Unknown vanities are remembered for this long (seconds) before the database is asked
+# again, up to VANITY_NEGATIVE_SIZE of them
+VANITY_NEGATIVE_TTL = 60
+VANITY_NEGATIVE_SIZE = 10000
+
+# Shared cache key prefix removed (with the lowercased code appended) to tell all
+# workers that a vanity changed
+VANITY_INVALIDATE_PREFIX = "vanity:"
+
+# Verified API tokens are cached per worker for this long (seconds), up to
+# AUTH_CACHE_SIZE of them
+AUTH_CACHE_TTL = 60
+AUTH_CACHE_SIZE = 10000
+
+# How often workers check whether the bot token digest migration has finished (seconds)
+AUTH_DIGEST_CHECK_INTERVAL = 60
+
+# Shared cache key prefix removed (with "{target type}:{id}" appended) to tell all
+# workers that a token or a user's state changed
+AUTH_INVALIDATE_PREFIX = "auth:"
+
+# How long a user's staff permission is cached (seconds). Silverpelt also invalidates
+# it whenever the user's roles in the main server change
+PERMS_CACHE_TTL = 60 * 10
+
+# Upper bound on how long a value lives in the in-process (L1) cache. This bounds
+# staleness if an invalidation message is ever missed
+CACHE_L1_MAX_TTL = 30
+
+# Errors that make the shared cache fall back to L1 only
+REDIS_ERRORS = (aioredis.RedisError, OSError, asyncio.TimeoutError)
+
+# Max number of snippets resolved at once (an index section is 12 snippets)
+SNIPPET_CONCURRENCY = 16
 
 
 class SilverException(Exception):
@@ -44,6 +178,1853 @@ class SilverNoData(SilverException):
     ...
 
 
+class SilverUserLoader:
+    """
+    Coalesces Silverpelt user lookups made in the same event loop iteration into
+    ``users/batch`` requests (one round trip instead of one per user)
+    """
+
+    __slots__ = ("mapleshade", "pending", "tasks", "max_batch", "stats")
+
+    def __init__(self, mapleshade: "Mapleshade", max_batch: int = 100):
+        self.mapleshade = mapleshade
+        self.pending: dict[int, asyncio.Future] = {}
+        self.tasks: set[asyncio.Task] = set()
+        self.max_batch = max_batch
+        self.stats: dict[str, int] = {"loads": 0, "batches": 0}
+
+    async def load(self, user_id: int) -> dict:
+        """Loads a user, raising SilverNoData if Silverpelt could not find them"""
+        user_id = int(user_id)
+        self.stats["loads"] += 1
+
+        if not (fut := self.pending.get(user_id)):
+            loop = asyncio.get_running_loop()
+
+            if not self.pending:
+                # First lookup of this iteration, dispatch once everyone had a chance to queue
+                loop.call_soon(self._dispatch)
+
+            fut = self.pending[user_id] = loop.create_future()
+
+        return await asyncio.shield(fut)
+
+    async def load_many(self, user_ids: list[int]) -> dict[int, dict]:
+        """Loads many users at once returning a dict of the users that could be found"""
+        user_ids = list(dict.fromkeys(int(user_id) for user_id in user_ids))
+
+        users = await asyncio.gather(
+            *[self.load(user_id) for user_id in user_ids], return_exceptions=True
+        )
+
+        found = {}
+
+        for user_id, user in zip(user_ids, users):
+            if isinstance(user, SilverNoData):
+                continue
+            elif isinstance(user, BaseException):
+                print(f"Failed to get user {user_id}: {user}")
+                continue
+            found[user_id] = user
+
+        return found
+
+    def _dispatch(self):
+        """Sends all pending lookups to Silverpelt in batches of ``max_batch``"""
+        pending, self.pending = self.pending, {}
+        user_ids = list(pending.keys())
+
+        for i in range(0, len(user_ids), self.max_batch):
+            batch = {
+                user_id: pending[user_id]
+                for user_id in user_ids[i : i + self.max_batch]
+            }
+            task = asyncio.create_task(self._resolve(batch))
+            self.tasks.add(task)
+            task.add_done_callback(self.tasks.discard)
+
+    async def _resolve(self, batch: dict[int, asyncio.Future]):
+        """Resolves a batch of lookups with one ``users/batch`` request"""
+        self.stats["batches"] += 1
+
+        try:
+            users = await self.mapleshade.silverpelt_req(
+                "users/batch",
+                method="POST",
+                data=silver_types.UserBatch(ids=list(batch.keys())),
+            )
+        except Exception as exc:
+            for fut in batch.values():
+                if not fut.done():
+                    fut.set_exception(exc)
+            return
+
+        for (user_id, fut), user in zip(batch.items(), users):
+            if fut.done():
+                continue
+
+            if user:
+                fut.set_result(user)
+            else:
+                fut.set_exception(
+                    SilverNoData(f"Silverpelt returned no data for user {user_id}")
+                )
+
+
+class ListMetaCache:
+    """
+    Preloaded, versioned in-memory registry of bot/server tags and features
+
+    These tables almost never change so they are loaded on startup and reloaded on a timer
+    (or on ``invalidate``). Membership checks are O(1) set lookups and ``/meta`` is served
+    as a pre-serialized ORJSON blob
+    """
+
+    __slots__ = (
+        "version",
+        "bot_tags",
+        "server_tags",
+        "features",
+        "bot_tag_ids",
+        "server_tag_ids",
+        "feature_ids",
+        "meta_bytes",
+        "task",
+    )
+
+    def __init__(self):
+        self.version = 0  # Bumped on every reload, 0 means not loaded yet
+        self.bot_tags: dict[str, models.Tag] = {}
+        self.server_tags: dict[str, models.Tag] = {}
+        self.features: dict[str, models.Feature] = {}
+        self.bot_tag_ids: frozenset[str] = frozenset()
+        self.server_tag_ids: frozenset[str] = frozenset()
+        self.feature_ids: frozenset[str] = frozenset()
+        self.meta_bytes: bytes = b""
+        self.task: asyncio.Task | None = None
+
+    async def refresh(self):
+        """Reloads all tags and features from the database and swaps them in at once"""
+        bot_tags = {
+            tag.id: tag for tag in models.Tag.to_list(await tables.BotListTags.select())
+        }
+        server_tags = {
+            tag.id: tag
+            for tag in models.Tag.to_list(await tables.ServerListTags.select())
+        }
+        features = {
+            feature.id: feature
+            for feature in models.Feature.to_list(await tables.Features.select())
+        }
+
+        meta = models.ListMeta(
+            bot=models.BotListMeta(
+                tags=list(bot_tags.values()),
+                features=list(features.values()),
+            ),
+            server=models.ServerListMeta(
+                tags=list(server_tags.values()),
+            ),
+        )
+
+        (
+            self.bot_tags,
+            self.server_tags,
+            self.features,
+            self.bot_tag_ids,
+            self.server_tag_ids,
+            self.feature_ids,
+            self.meta_bytes,
+        ) = (
+            bot_tags,
+            server_tags,
+            features,
+            frozenset(bot_tags),
+            frozenset(server_tags),
+            frozenset(features),
+            orjson.dumps(meta.dict()),
+        )
+
+        self.version += 1
+
+    async def _refresh_loop(self, interval: int | float):
+        """Reloads the registry every ``interval`` seconds"""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.refresh()
+            except Exception as exc:
+                print(f"Failed to refresh list metadata: {exc}")
+
+    async def start(self, interval: int | float = LIST_META_REFRESH_INTERVAL):
+        """Loads the registry and starts the refresh timer (called on startup)"""
+        await self.refresh()
+
+        if not self.task:
+            self.task = asyncio.create_task(self._refresh_loop(interval))
+
+    def stop(self):
+        """Stops the refresh timer (called on shutdown)"""
+        if self.task:
+            self.task.cancel()
+            self.task = None
+
+    def invalidate(self) -> asyncio.Task:
+        """Schedules a reload of the registry (use after tags/features are edited)"""
+        return asyncio.create_task(self.refresh())
+
+
+class SanitizeCache:
+    """
+    LRU cache of sanitized HTML keyed by (hash of source, ``LongDescriptionType``, sanitizer version)
+
+    Sanitizing is deterministic so the output can be reused across requests. The cache is bounded
+    by the total size of the cached HTML in bytes rather than by entry count
+    """
+
+    __slots__ = ("entries", "budget", "size", "hits", "misses", "evictions")
+
+    def __init__(self, budget: int = SANITIZE_CACHE_BUDGET):
+        # Key -> (html, size in bytes)
+        self.entries: OrderedDict[tuple, tuple[str, int]] = OrderedDict()
+        self.budget = budget
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key(
+        s: str, long_description_type: models.LongDescriptionType
+    ) -> tuple[bytes, int, int]:
+        """Returns the cache key for a source string"""
+        return (
+            hashlib.blake2b(s.encode(), digest_size=16).digest(),
+            int(long_description_type),
+            SANITIZER_VERSION,
+        )
+
+    def get(self, key: tuple[bytes, int, int]) -> Optional[str]:
+        """Returns the cached HTML for a key (if any), marking it as recently used"""
+        entry = self.entries.get(key)
+
+        if entry is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return entry[0]
+
+    def set(self, key: tuple[bytes, int, int], html: str):
+        """Caches HTML for a key, evicting the least recently used entries to stay within budget"""
+        size = len(html.encode())
+
+        if size > self.budget:
+            return
+
+        if (old := self.entries.pop(key, None)) is not None:
+            self.size -= old[1]
+
+        self.entries[key] = (html, size)
+        self.size += size
+
+        while self.size > self.budget:
+            _, (_, evicted_size) = self.entries.popitem(last=False)
+            self.size -= evicted_size
+            self.evictions += 1
+
+    def stats(self) -> dict[str, int]:
+        """Returns hit/miss/size statistics for monitoring"""
+        return {
+            "entries": len(self.entries),
+            "size": self.size,
+            "budget": self.budget,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+def _pack_default(obj: Any) -> Any:
+    """msgpack hook for types it cannot serialize natively"""
+    if isinstance(obj, BaseModel):
+        return obj.dict()
+    if isinstance(obj, enum.Enum):
+        return obj.value
+    if isinstance(obj, datetime):
+        return obj.isoformat()
+    if isinstance(obj, uuid.UUID):
+        return str(obj)
+    raise TypeError(f"Cannot serialize {type(obj).__name__} for the shared cache")
+
+
+class TieredCache:
+    """
+    Two tier cache, an in-process maplecache (L1) in front of redis (L2)
+
+    Values are stored in redis as msgpack (pydantic models are stored as dicts) so that
+    bot add tickets, task results and indexes are visible to every worker. L1 holds the
+    same unpacked msgpack, so values read back as the same type from either tier. Writes
+    and removals are published on a pub/sub channel so that other workers drop their
+    L1 copy. If redis is unavailable, the cache degrades to L1 only
+    """
+
+    __slots__ = (
+        "l1",
+        "redis",
+        "worker_id",
+        "listeners",
+        "task",
+        "inflight",  # Key -> future of the coroutine currently computing it
+        "background",  # Running stale-while-revalidate refreshes
+        "l1_hits",
+        "l2_hits",
+        "misses",
+        "l2_errors",
+        "invalidations",
+        "computes",
+        "coalesced",
+        "stale_hits",
+        "refresh_errors",
+    )
+
+    def __init__(self, redis: aioredis.Redis):
+        self.l1 = Cache()
+        self.redis = redis
+        self.worker_id = uuid.uuid4().hex
+        self.listeners: list[tuple[str, Callable[[str], Any]]] = []
+        self.task: Optional[asyncio.Task] = None
+        self.inflight: dict[str, asyncio.Future] = {}
+        self.background: set[asyncio.Task] = set()
+        self.l1_hits = 0
+        self.l2_hits = 0
+        self.misses = 0
+        self.l2_errors = 0
+        self.invalidations = 0
+        self.computes = 0
+        self.coalesced = 0
+        self.stale_hits = 0
+        self.refresh_errors = 0
+
+    @staticmethod
+    def l1_expiry(expiry: Optional[int | float]) -> int | float:
+        """Returns the L1 expiry for a value with the given (shared) expiry"""
+        if not expiry or expiry < 0:
+            return CACHE_L1_MAX_TTL
+        return min(expiry, CACHE_L1_MAX_TTL)
+
+    def l1_set(self, key: str, value: Any, expiry: Optional[int | float]):
+        """
+        Sets a value in L1. maplecache cannot overwrite a key (the old entry's expiry
+        timer removes the new one right away), so the old entry is removed first
+        """
+        self.l1_remove(key)
+        self.l1.set(key, value, expiry=self.l1_expiry(expiry))
+
+    def l1_remove(self, key: str):
+        """Removes a value from L1, also stopping its expiry timer"""
+        if entry := self.l1.entries().mapping.get(key):
+            entry.remove()
+
+        self.l1.remove(key)
+
+    async def get(self, key: str) -> Optional[BorrowedCacheValue]:
+        """Gets a value, checking L1 and then redis (filling L1 on a redis hit)"""
+        if cached := self.l1.get(key):
+            self.l1_hits += 1
+            return cached
+
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                raw, ttl = (
+                    await pipe.get(CACHE_KEY_PREFIX + key)
+                    .pttl(CACHE_KEY_PREFIX + key)
+                    .execute()
+                )
+        except REDIS_ERRORS:
+            self.l2_errors += 1
+            self.misses += 1
+            return None
+
+        if raw is None:
+            self.misses += 1
+            return None
+
+        self.l2_hits += 1
+        self.l1_set(
+            key,
+            msgpack.unpackb(raw, strict_map_key=False),
+            ttl / 1000 if ttl > 0 else None,
+        )
+        return self.l1.get(key)
+
+    async def set(self, key: str, value: Any, *, expiry: int | float):
+        """
+        Sets a value in both tiers and tells the other workers to drop their copy. Every
+        value needs an expiry so nothing stays in redis forever
+        """
+        raw = msgpack.packb(value, default=_pack_default)
+
+        self.l1_set(key, msgpack.unpackb(raw, strict_map_key=False), expiry)
+        self.notify(key)
+
+        try:
+            await self.redis.set(
+                CACHE_KEY_PREFIX + key,
+                raw,
+                px=int(expiry * 1000),
+            )
+            await self.publish(key)
+        except REDIS_ERRORS:
+            self.l2_errors += 1
+
+    async def remove(self, key: str):
+        """Removes a value from both tiers and tells the other workers to drop their copy"""
+        self.l1_remove(key)
+        self.notify(key)
+
+        try:
+            await self.redis.delete(CACHE_KEY_PREFIX + key)
+            await self.publish(key)
+        except REDIS_ERRORS:
+            self.l2_errors += 1
+
+    async def claim(self, key: str, expiry: int | float) -> bool:
+        """
+        Claims a key for ``expiry`` seconds so only one worker works on it (like
+        recomputing it), returns False if another worker holds the claim. Without redis
+        every claim succeeds
+        """
+        try:
+            return bool(
+                await self.redis.set(
+                    f"{CACHE_KEY_PREFIX}claim:{key}",
+                    self.worker_id,
+                    nx=True,
+                    px=int(expiry * 1000),
+                )
+            )
+        except REDIS_ERRORS:
+            self.l2_errors += 1
+            return True
+
+    async def publish(self, key: str):
+        """Publishes an invalidation for a key"""
+        await self.redis.publish(
+            CACHE_INVALIDATE_CHANNEL, msgpack.packb([self.worker_id, key])
+        )
+
+    async def get_computed(self, key: str) -> Optional[tuple[float, Any]]:
+        """
+        Returns ``(fresh_until, value)`` of a key written by ``get_or_compute`` or
+        ``refresh`` without computing it, or None if the key is not cached
+        """
+        if cached := await self.get(key):
+            fresh_until, value = cached.value()
+            return fresh_until, value
+        return None
+
+    async def get_or_compute(
+        self,
+        key: str,
+        compute: Callable[[], Awaitable[Any]],
+        *,
+        expiry: int | float,
+        stale: int | float = 0,
+    ) -> Any:
+        """
+        Returns the cached value of a key, computing it with ``compute`` on a miss
+
+        Concurrent misses on the same key share a single ``compute`` call. Values are
+        kept for ``stale`` seconds past ``expiry``, during which the old value is served
+        while one background refresh runs. Keys used here must only be read and written
+        through ``get_or_compute``/``refresh`` as the value is stored with its freshness
+        """
+        if cached := await self.get(key):
+            fresh_until, value = cached.value()
+
+            if fresh_until < time.time():
+                self.stale_hits += 1
+
+                if key not in self.inflight:
+                    task = asyncio.create_task(
+                        self._refresh_in_background(key, compute, expiry, stale)
+                    )
+                    self.background.add(task)
+                    task.add_done_callback(self.background.discard)
+
+            return value
+
+        return await self.refresh(key, compute, expiry=expiry, stale=stale)
+
+    async def refresh(
+        self,
+        key: str,
+        compute: Callable[[], Awaitable[Any]],
+        *,
+        expiry: int | float,
+        stale: int | float = 0,
+    ) -> Any:
+        """
+        Recomputes a key and caches the result (None is returned but not cached). If the
+        key is already being computed, waits for that instead
+        """
+        if fut := self.inflight.get(key):
+            self.coalesced += 1
+            return await asyncio.shield(fut)
+
+        fut = asyncio.get_running_loop().create_future()
+        self.inflight[key] = fut
+        self.computes += 1
+
+        try:
+            value = await compute()
+
+            if value is not None:
+                await self.set(
+                    key, [time.time() + expiry, value], expiry=expiry + stale
+                )
+        except BaseException as exc:
+            if isinstance(exc, asyncio.CancelledError):
+                fut.cancel()
+            else:
+                fut.set_exception(exc)
+                # Avoid "exception was never retrieved" if nobody else was waiting
+                fut.exception()
+            raise
+        else:
+            fut.set_result(value)
+            return value
+        finally:
+            self.inflight.pop(key, None)
+
+    async def _refresh_in_background(
+        self,
+        key: str,
+        compute: Callable[[], Awaitable[Any]],
+        expiry: int | float,
+        stale: int | float,
+    ):
+        """Refreshes a stale key, logging (instead of raising) any errors"""
+        try:
+            await self.refresh(key, compute, expiry=expiry, stale=stale)
+        except Exception as exc:
+            self.refresh_errors += 1
+            print(f"Failed to refresh {key} in the background: {exc}")
+
+    def add_listener(self, prefix: str, callback: Callable[[str], Any]):
+        """
+        Calls ``callback(key)`` whenever a key starting with ``prefix`` is set or removed,
+        either by this worker or by another one. Callbacks must not block
+        """
+        self.listeners.append((prefix, callback))
+
+    def notify(self, key: str):
+        """Calls the listeners registered for a key"""
+        for prefix, callback in self.listeners:
+            if key.startswith(prefix):
+                callback(key)
+
+    def clear_l1(self):
+        """Drops every L1 entry"""
+        for key in [key for key, _ in self.l1.entries()]:
+            self.l1_remove(key)
+
+    async def _listen(self):
+        """Applies invalidations published by other workers, resubscribing on errors"""
+        while True:
+            pubsub = self.redis.pubsub()
+            try:
+                await pubsub.subscribe(CACHE_INVALIDATE_CHANNEL)
+
+                # Invalidations may have been missed while we were not subscribed
+                self.clear_l1()
+
+                async for message in pubsub.listen():
+                    if message["type"] != "message":
+                        continue
+
+                    origin, key = msgpack.unpackb(message["data"])
+
+                    if origin == self.worker_id:
+                        continue
+
+                    self.invalidations += 1
+                    self.l1_remove(key)
+                    self.notify(key)
+            except REDIS_ERRORS as exc:
+                self.l2_errors += 1
+                print(f"Cache invalidation listener lost redis: {exc}")
+            finally:
+                try:
+                    await pubsub.reset()
+                except REDIS_ERRORS:
+                    pass
+
+            await asyncio.sleep(5)
+
+    def start(self):
+        """Starts listening for invalidations from other workers"""
+        self.task = asyncio.create_task(self._listen())
+
+    async def stop(self):
+        """Stops the invalidation listener and closes the redis connection"""
+        if self.task:
+            self.task.cancel()
+            self.task = None
+
+        await self.redis.close()
+
+    def stats(self) -> dict[str, int]:
+        """Returns hit/miss statistics for monitoring"""
+        return {
+            "l1_entries": len(self.l1.entries()),
+            "l1_hits": self.l1_hits,
+            "l2_hits": self.l2_hits,
+            "misses": self.misses,
+            "l2_errors": self.l2_errors,
+            "invalidations": self.invalidations,
+            "inflight": len(self.inflight),
+            "computes": self.computes,
+            "coalesced": self.coalesced,
+            "stale_hits": self.stale_hits,
+            "refresh_errors": self.refresh_errors,
+        }
+
+
+class ChangeFeed:
+    """
+    Listens (with LISTEN/NOTIFY) for the notifications triggers send when bots, servers
+    and users change, no matter who changes them (the API, staff tools or a query)
+
+    Payloads are collected for ``CHANGE_FEED_DELAY`` seconds and then handed to the
+    handlers of their channel as one set. Notifications sent while the listener is
+    reconnecting are lost, so handlers get None instead after a reconnect and must then
+    reload everything
+    """
+
+    __slots__ = (
+        "mapleshade",
+        "handlers",
+        "pending",
+        "ready",
+        "tasks",
+        "received",
+        "batches",
+        "reconnects",
+        "errors",
+    )
+
+    def __init__(self, mapleshade: "Mapleshade"):
+        self.mapleshade = mapleshade
+        self.handlers: dict[
+            str, list[Callable[[Optional[set[str]]], Awaitable[Any]]]
+        ] = {}
+        self.pending: dict[str, set[str]] = {}  # Channel -> payloads not yet handled
+        self.ready = asyncio.Event()
+        self.tasks: list[asyncio.Task] = []
+        self.received = 0
+        self.batches = 0
+        self.reconnects = 0
+        self.errors = 0
+
+    @staticmethod
+    def targets(payloads: set[str]) -> dict[models.TargetType, list[int]]:
+        """Groups ``"{target type}:{id}"`` payloads by target type"""
+        targets: dict[models.TargetType, list[int]] = {}
+
+        for payload in payloads:
+            target_type, id = payload.split(":")
+            targets.setdefault(models.TargetType(int(target_type)), []).append(int(id))
+
+        return targets
+
+    def add_handler(
+        self, channel: str, handler: Callable[[Optional[set[str]]], Awaitable[Any]]
+    ):
+        """Calls ``handler`` with the payloads sent on ``channel`` (before start)"""
+        self.handlers.setdefault(channel, []).append(handler)
+
+    def notified(self, _conn: Any, _pid: int, channel: str, payload: str):
+        """Queues a notification (asyncpg listener callback)"""
+        self.received += 1
+        self.pending.setdefault(channel, set()).add(payload)
+        self.ready.set()
+
+    async def dispatch(self, changes: dict[str, Optional[set[str]]]):
+        """Hands payloads to the handlers of their channel, logging any errors"""
+        for channel, payloads in changes.items():
+            for handler in self.handlers.get(channel, []):
+                try:
+                    await handler(payloads)
+                except Exception as exc:
+                    self.errors += 1
+                    print(f"Failed to handle changes on {channel}: {exc}")
+
+    async def _dispatch_loop(self):
+        """Handles queued notifications in batches"""
+        while True:
+            await self.ready.wait()
+            await asyncio.sleep(CHANGE_FEED_DELAY)
+
+            self.ready.clear()
+            pending, self.pending = self.pending, {}
+
+            self.batches += 1
+            await self.dispatch(pending)
+
+    async def _listen(self):
+        """Listens on a pooled connection, reconnecting (with a reload) on errors"""
+        connected = False
+
+        while True:
+            lost = asyncio.Event()
+
+            try:
+                async with self.mapleshade.pool.acquire() as conn:
+                    conn.add_termination_listener(lambda _: lost.set())
+
+                    for channel in self.handlers:
+                        await conn.add_listener(channel, self.notified)
+
+                    try:
+                        if connected:
+                            self.reconnects += 1
+                            await self.dispatch(dict.fromkeys(self.handlers))
+
+                        connected = True
+                        await lost.wait()
+                    finally:
+                        if not lost.is_set():
+                            for channel in self.handlers:
+                                await conn.remove_listener(channel, self.notified)
+            except (asyncpg.PostgresError, asyncpg.InterfaceError, OSError) as exc:
+                print(f"Change feed lost the database: {exc}")
+
+            await asyncio.sleep(5)
+
+    def start(self):
+        """Starts listening (called on startup)"""
+        if not self.tasks:
+            self.tasks = [
+                asyncio.create_task(self._listen()),
+                asyncio.create_task(self._dispatch_loop()),
+            ]
+
+    def stop(self):
+        """Stops listening, releasing the pooled connection (before the pool closes)"""
+        for task in self.tasks:
+            task.cancel()
+
+        self.tasks = []
+
+    def stats(self) -> dict[str, int]:
+        """Returns notification statistics for monitoring"""
+        return {
+            "received": self.received,
+            "batches": self.batches,
+            "reconnects": self.reconnects,
+            "errors": self.errors,
+        }
+
+
+class IndexSnapshots:
+    """
+    Bot and server indexes, rebuilt every ``INDEX_REFRESH_INTERVAL`` seconds and kept as
+    ORJSON bytes along with their ETag
+
+    ``/index`` serves these bytes as is, so requests never build, validate or serialize
+    an index. The indexes are shared between workers through ``mapleshade.cache``: when
+    the shared copy expires, the worker that claims it first rebuilds it and the others
+    pick it up from the cache. If a rebuild fails the previous snapshot is still served
+    """
+
+    __slots__ = ("mapleshade", "snapshots", "task", "refreshes", "rebuilds", "errors")
+
+    def __init__(self, mapleshade: "Mapleshade"):
+        self.mapleshade = mapleshade
+        # Target type -> (body, etag)
+        self.snapshots: dict[models.TargetType, tuple[bytes, str]] = {}
+        self.task: Optional[asyncio.Task] = None
+        self.refreshes = 0
+        self.rebuilds = 0  # Refreshes where this worker built the index itself
+        self.errors = 0
+
+    @staticmethod
+    def etag_matches(etag: str, if_none_match: str) -> bool:
+        """
+        Returns whether an ``If-None-Match`` header (a comma separated list of entity
+        tags, or ``*``) matches an ETag, using weak comparison like RFC 7232 asks for
+        """
+        for tag in if_none_match.split(","):
+            tag = tag.strip()
+
+            if tag == "*" or tag.removeprefix("W/") == etag:
+                return True
+
+        return False
+
+    async def encode(self, target_type: models.TargetType) -> bytes:
+        """Builds an index and encodes it as ORJSON"""
+        return orjson.dumps((await self.mapleshade.build_index(target_type)).dict())
+
+    async def refresh_one(self, target_type: models.TargetType) -> float:
+        """
+        Updates the snapshot of an index from its shared copy, rebuilding the shared
+        copy if it has expired and no other worker claimed the rebuild. Returns when
+        the snapshot should be refreshed next
+        """
+        cache = self.mapleshade.cache
+        key = f"{target_type.name.lower()}_index"
+
+        if (cached := await cache.get_computed(key)) and cached[0] > time.time():
+            fresh_until, body = cached
+        elif (
+            await cache.claim(key, INDEX_BUILD_TIMEOUT)
+            or target_type not in self.snapshots
+        ):
+            body = await cache.refresh(
+                key,
+                functools.partial(self.encode, target_type),
+                expiry=INDEX_REFRESH_INTERVAL,
+            )
+            fresh_until = time.time() + INDEX_REFRESH_INTERVAL
+            self.rebuilds += 1
+        else:
+            # Another worker is rebuilding it
+            return time.time() + INDEX_POLL_INTERVAL
+
+        old = self.snapshots.get(target_type)
+
+        if not old or old[0] != body:
+            etag = f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+            self.snapshots[target_type] = (body, etag)
+
+        return fresh_until
+
+    async def refresh(self) -> float:
+        """
+        Refreshes the bot and server index snapshots (keeping the old ones on errors),
+        returns when they should be refreshed next
+        """
+        next_refresh = time.time() + INDEX_REFRESH_INTERVAL
+
+        for target_type in (models.TargetType.Bot, models.TargetType.Server):
+            try:
+                next_refresh = min(next_refresh, await self.refresh_one(target_type))
+            except Exception as exc:
+                self.errors += 1
+                print(f"Failed to refresh the {target_type.name} index: {exc}")
+                next_refresh = min(next_refresh, time.time() + INDEX_BUILD_TIMEOUT)
+
+        self.refreshes += 1
+        return next_refresh
+
+    async def get(self, target_type: models.TargetType) -> tuple[bytes, str]:
+        """Returns the snapshot of an index, building it if there is none yet"""
+        if snapshot := self.snapshots.get(target_type):
+            return snapshot
+
+        await self.refresh_one(target_type)
+        return self.snapshots[target_type]
+
+    async def _refresh_loop(self, next_refresh: float):
+        """Refreshes the snapshots whenever their shared copy expires"""
+        while True:
+            await asyncio.sleep(max(next_refresh - time.time(), 0))
+            next_refresh = await self.refresh()
+
+    async def start(self):
+        """Builds the snapshots and starts the refresh timer (called on startup)"""
+        next_refresh = await self.refresh()
+
+        if not self.task:
+            self.task = asyncio.create_task(self._refresh_loop(next_refresh))
+
+    def stop(self):
+        """Stops the refresh timer (called on shutdown)"""
+        if self.task:
+            self.task.cancel()
+            self.task = None
+
+    def stats(self) -> dict[str, Any]:
+        """Returns refresh statistics for monitoring"""
+        return {
+            "refreshes": self.refreshes,
+            "rebuilds": self.rebuilds,
+            "errors": self.errors,
+            "etags": {
+                target_type.name: etag
+                for target_type, (_, etag) in self.snapshots.items()
+            },
+        }
+
+
+class IDPool:
+    """Set of IDs with O(1) add, remove and uniform random sampling"""
+
+    __slots__ = ("ids", "positions")
+
+    def __init__(self, ids: Optional[list[int]] = None):
+        self.ids: list[int] = []
+        self.positions: dict[int, int] = {}
+
+        for id in ids or []:
+            self.add(id)
+
+    def add(self, id: int):
+        """Adds an ID (if not already present)"""
+        if id not in self.positions:
+            self.positions[id] = len(self.ids)
+            self.ids.append(id)
+
+    def remove(self, id: int):
+        """Removes an ID (if present) by swapping it with the last one"""
+        if (pos := self.positions.pop(id, None)) is None:
+            return
+
+        last = self.ids.pop()
+
+        if pos < len(self.ids):
+            self.ids[pos] = last
+            self.positions[last] = pos
+
+    def sample(self, k: int) -> list[int]:
+        """Returns up to ``k`` distinct random IDs"""
+        return random.sample(self.ids, min(k, len(self.ids)))
+
+    def __contains__(self, id: int) -> bool:
+        """Returns whether an ID is in the pool"""
+        return id in self.positions
+
+    def __len__(self) -> int:
+        """Returns the number of IDs in the pool"""
+        return len(self.ids)
+
+
+class RandomSampler:
+    """
+    Random approved/certified bots and servers without ``ORDER BY RANDOM()``
+
+    The eligible IDs are kept in memory and a few random snippets per target type are
+    resolved ahead of time so that picking one is O(1). Bots and servers that are
+    listed, delisted or deleted are applied from the change feed as they happen. As a
+    fallback, bots are also synced using ``last_updated_at`` (which a trigger bumps on
+    state changes) and everything is reloaded on a longer timer
+    """
+
+    __slots__ = (
+        "mapleshade",
+        "pools",
+        "prefilled",
+        "fillers",
+        "synced_at",
+        "task",
+        "hits",
+        "misses",
+    )
+
+    ELIGIBLE_STATES = (models.BotServerState.Approved, models.BotServerState.Certified)
+
+    def __init__(self, mapleshade: "Mapleshade"):
+        self.mapleshade = mapleshade
+        self.pools = {
+            models.TargetType.Bot: IDPool(),
+            models.TargetType.Server: IDPool(),
+        }
+        self.prefilled: dict[models.TargetType, deque[models.Snippet]] = {
+            target_type: deque() for target_type in self.pools
+        }
+        self.fillers: dict[models.TargetType, asyncio.Task] = {}
+        self.synced_at: Optional[datetime] = None  # Newest bot last_updated_at seen
+        self.task: Optional[asyncio.Task] = None
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def source(target_type: models.TargetType) -> tuple[Any, Any, tuple]:
+        """Returns the table, ID column and snippet columns of a target type"""
+        if target_type == models.TargetType.Bot:
+            return tables.Bots, tables.Bots.bot_id, models.BOT_SNIPPET_COLS
+        return tables.Servers, tables.Servers.guild_id, models.SERVER_SNIPPET_COLS
+
+    async def reload(self):
+        """Reloads all eligible IDs from the database"""
+        self.synced_at = await self.mapleshade.pool.fetchval(
+            "SELECT max(last_updated_at) FROM bots"
+        )
+
+        for target_type in self.pools:
+            table, id_col, _ = self.source(target_type)
+            name = id_col._meta.name
+
+            rows = await table.select(id_col).where(
+                table.state.is_in(list(self.ELIGIBLE_STATES))
+            )
+
+            self.pools[target_type] = IDPool([row[name] for row in rows])
+
+    async def sync(self):
+        """Applies bot changes made since the last sync"""
+        if not self.synced_at:
+            return await self.reload()
+
+        rows = await tables.Bots.select(
+            tables.Bots.bot_id, tables.Bots.state, tables.Bots.last_updated_at
+        ).where(tables.Bots.last_updated_at > self.synced_at - CHANGE_SYNC_OVERLAP)
+
+        pool = self.pools[models.TargetType.Bot]
+
+        for row in rows:
+            if row["state"] in self.ELIGIBLE_STATES:
+                pool.add(row["bot_id"])
+            else:
+                pool.remove(row["bot_id"])
+
+            self.synced_at = max(self.synced_at, row["last_updated_at"])
+
+    async def update(self, target_type: models.TargetType, ids: list[int]):
+        """Adds the given IDs that are listed and removes the others (e.g. deleted)"""
+        table, id_col, _ = self.source(target_type)
+        name = id_col._meta.name
+
+        listed = {
+            row[name]
+            for row in await table.select(id_col).where(
+                id_col.is_in(ids) & table.state.is_in(list(self.ELIGIBLE_STATES))
+            )
+        }
+
+        pool = self.pools[target_type]
+
+        for id in ids:
+            if id in listed:
+                pool.add(id)
+            else:
+                pool.remove(id)
+
+    async def on_change(self, payloads: Optional[set[str]]):
+        """Applies listing changes from the change feed (None reloads everything)"""
+        if payloads is None:
+            return await self.reload()
+
+        for target_type, ids in ChangeFeed.targets(payloads).items():
+            if target_type in self.pools:
+                await self.update(target_type, ids)
+
+    async def resolve(
+        self, target_type: models.TargetType, ids: list[int]
+    ) -> list[models.Snippet]:
+        """Resolves the snippets of a list of IDs (failed ones are left out)"""
+        if not ids:
+            return []
+
+        table, id_col, cols = self.source(target_type)
+
+        return await self.mapleshade.to_snippet(
+            await table.select(*cols).where(id_col.is_in(ids))
+        )
+
+    async def _fill(self, target_type: models.TargetType):
+        """Tops up the prefilled snippets of a target type"""
+        queue = self.prefilled[target_type]
+
+        while len(queue) < RANDOM_PREFILL:
+            ids = self.pools[target_type].sample(RANDOM_PREFILL - len(queue))
+            snippets = await self.resolve(target_type, ids)
+
+            if not snippets:
+                # Nothing eligible or Silverpelt is down, try again on the next sample
+                break
+
+            queue.extend(snippets)
+
+    def fill(self, target_type: models.TargetType):
+        """Starts topping up the prefilled snippets (if not already doing so)"""
+        task = self.fillers.get(target_type)
+
+        if not task or task.done():
+            self.fillers[target_type] = asyncio.create_task(self._fill(target_type))
+
+    async def sample(self, target_type: models.TargetType) -> Optional[models.Snippet]:
+        """Returns a random approved/certified bot or server (None if there are none)"""
+        queue = self.prefilled[target_type]
+        pool = self.pools[target_type]
+
+        self.fill(target_type)
+
+        while queue:
+            snippet = queue.popleft()
+
+            # The bot/server may have been removed since the snippet was resolved
+            if int(snippet.user.id) in pool:
+                self.hits += 1
+                return snippet
+
+        self.misses += 1
+
+        for _ in range(3):
+            if snippets := await self.resolve(target_type, pool.sample(1)):
+                return snippets[0]
+
+        return None
+
+    async def _refresh_loop(self):
+        """Syncs bot changes and periodically reloads everything"""
+        last_reload = time.monotonic()
+
+        while True:
+            await asyncio.sleep(RANDOM_SYNC_INTERVAL)
+            try:
+                if time.monotonic() - last_reload >= RANDOM_RELOAD_INTERVAL:
+                    await self.reload()
+                    last_reload = time.monotonic()
+                else:
+                    await self.sync()
+            except Exception as exc:
+                print(f"Failed to refresh the random sampler: {exc}")
+
+    async def start(self):
+        """Loads the eligible IDs, prefills snippets and starts the refresh timer"""
+        await self.reload()
+
+        for target_type in self.pools:
+            self.fill(target_type)
+
+        if not self.task:
+            self.task = asyncio.create_task(self._refresh_loop())
+
+    def stop(self):
+        """Stops the refresh timer and any running prefills"""
+        for task in [self.task, *self.fillers.values()]:
+            if task:
+                task.cancel()
+
+        self.task = None
+        self.fillers = {}
+
+    def stats(self) -> dict[str, Any]:
+        """Returns pool sizes and prefill hit/miss statistics for monitoring"""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "pools": {
+                target_type.name: len(pool) for target_type, pool in self.pools.items()
+            },
+            "prefilled": {
+                target_type.name: len(queue)
+                for target_type, queue in self.prefilled.items()
+            },
+        }
+
+
+class SuggestIndex:
+    """
+    In-memory prefix index for search-as-you-type over bot/server names, tags and vanities
+
+    This is a sorted array of ``(key, kind, id)`` searched with bisect. Every word of a
+    name starts a key, so ``"music bot"`` can be found with both ``"mus"`` and ``"bo"``.
+    Changes are applied in batches. The change feed updates bots and servers (and their
+    vanities), bots are also synced using ``last_updated_at`` as a fallback and
+    everything (including tags) is rebuilt on a longer timer. Only listed
+    (approved/certified) bots and servers are indexed
+    """
+
+    __slots__ = ("mapleshade", "entries", "items", "synced_at", "task", "lookups")
+
+    def __init__(self, mapleshade: "Mapleshade"):
+        self.mapleshade = mapleshade
+        self.entries: list[tuple[str, str, str]] = []
+        # (kind, id) -> (label, score, keys)
+        self.items: dict[tuple[str, str], tuple[str, int, tuple[str, ...]]] = {}
+        self.synced_at: Optional[datetime] = None  # Newest bot last_updated_at seen
+        self.task: Optional[asyncio.Task] = None
+        self.lookups = 0
+
+    @staticmethod
+    def keys(label: str) -> tuple[str, ...]:
+        """
+        Returns the keys a label can be found by (the label starting at each word).
+        Labels are names, tags and vanities, which are short, so every word gets a key
+        """
+        words = label.lower().split()
+        return tuple({" ".join(words[i:]) for i in range(len(words))})
+
+    def apply(self, changes: list[tuple[str, Any, Optional[str], int]]):
+        """
+        Adds, replaces or (with no label) removes a batch of
+        ``(kind, id, label, score)`` items. Large batches are merged into the array with
+        a single sort (see ``SUGGEST_REBUILD_KEYS``)
+        """
+        # (kind, id) -> (label, score), the last change of an item wins
+        final = {(kind, str(id)): (label, score) for kind, id, label, score in changes}
+
+        removed = set()
+        added = []
+
+        for (kind, id), (label, score) in final.items():
+            if item := self.items.pop((kind, id), None):
+                removed.update((key, kind, id) for key in item[2])
+
+            if label:
+                keys = self.keys(label)
+                self.items[(kind, id)] = (label, score, keys)
+                added += [(key, kind, id) for key in keys]
+
+        if len(removed) + len(added) <= SUGGEST_REBUILD_KEYS:
+            for entry in removed:
+                i = bisect.bisect_left(self.entries, entry)
+
+                if i < len(self.entries) and self.entries[i] == entry:
+                    del self.entries[i]
+
+            for entry in added:
+                bisect.insort(self.entries, entry)
+
+            return
+
+        if removed:
+            self.entries = [entry for entry in self.entries if entry not in removed]
+
+        # The added entries are one sorted run after another, which sort merges
+        self.entries += sorted(added)
+        self.entries.sort()
+
+    def suggest(self, prefix: str, limit: int = 10) -> list[models.SearchSuggestion]:
+        """Returns up to ``limit`` items with a key starting with ``prefix`` (highest score first)"""
+        self.lookups += 1
+        prefix = " ".join(prefix.lower().split())
+
+        if not prefix:
+            return []
+
+        # (kind, id) -> None, as items can match through more than one key
+        matches: dict[tuple[str, str], None] = {}
+        i = bisect.bisect_left(self.entries, (prefix,))
+
+        while i < len(self.entries) and len(matches) < SUGGEST_SCAN:
+            key, kind, id = self.entries[i]
+
+            if not key.startswith(prefix):
+                break
+
+            matches[(kind, id)] = None
+            i += 1
+
+        ranked = sorted(matches, key=lambda match: self.items[match][1], reverse=True)
+
+        return [
+            models.SearchSuggestion(kind=kind, id=id, label=self.items[(kind, id)][0])
+            for kind, id in ranked[:limit]
+        ]
+
+    async def reload(self):
+        """Rebuilds the index from the database and the tag registry"""
+        eligible = [models.BotServerState.Approved, models.BotServerState.Certified]
+
+        synced_at = await self.mapleshade.pool.fetchval(
+            "SELECT max(last_updated_at) FROM bots"
+        )
+
+        # (kind, id, label, score)
+        rows: list[tuple[str, str, str, int]] = [
+            ("bot", str(bot["bot_id"]), bot["username_cached"], bot["votes"])
+            for bot in await tables.Bots.select(
+                tables.Bots.bot_id, tables.Bots.username_cached, tables.Bots.votes
+            ).where(tables.Bots.state.is_in(eligible))
+        ]
+
+        rows += [
+            ("server", str(server["guild_id"]), server["name_cached"], server["votes"])
+            for server in await tables.Servers.select(
+                tables.Servers.guild_id,
+                tables.Servers.name_cached,
+                tables.Servers.votes,
+            ).where(tables.Servers.state.is_in(eligible))
+        ]
+
+        rows += [
+            ("vanity", str(vanity["redirect"]), vanity["vanity_url"], 0)
+            for vanity in await self.mapleshade.pool.fetch(
+                self.mapleshade.sql.suggest_vanities,
+                [state.value for state in eligible],
+            )
+        ]
+
+        rows += [
+            ("bot_tag", tag.id, tag.name, 0)
+            for tag in self.mapleshade.meta.bot_tags.values()
+        ]
+        rows += [
+            ("server_tag", tag.id, tag.name, 0)
+            for tag in self.mapleshade.meta.server_tags.values()
+        ]
+
+        items = {}
+        entries = []
+
+        for kind, id, label, score in rows:
+            if not label:
+                continue
+
+            keys = self.keys(label)
+            items[(kind, id)] = (label, score, keys)
+            entries += [(key, kind, id) for key in keys]
+
+        # Sorting can take a while with a lot of bots, so keep it off the event loop
+        entries = await asyncio.to_thread(sorted, entries)
+
+        self.entries, self.items, self.synced_at = entries, items, synced_at
+
+    async def update(self, target_type: models.TargetType, ids: list[int]):
+        """Indexes the given bots or servers (and vanities), removing unlisted ones"""
+        if target_type == models.TargetType.Bot:
+            table, id_col, name_col = (
+                tables.Bots,
+                tables.Bots.bot_id,
+                tables.Bots.username_cached,
+            )
+            kind, vanity_type = "bot", 1
+        else:
+            table, id_col, name_col = (
+                tables.Servers,
+                tables.Servers.guild_id,
+                tables.Servers.name_cached,
+            )
+            kind, vanity_type = "server", 0
+
+        id_name, label_name = id_col._meta.name, name_col._meta.name
+
+        # Everything is removed first, so only what is still listed is added back
+        changes = [(kind, id, None, 0) for id in ids]
+        changes += [("vanity", id, None, 0) for id in ids]
+
+        rows = await table.select(id_col, name_col, table.votes).where(
+            id_col.is_in(ids)
+            & table.state.is_in(
+                [models.BotServerState.Approved, models.BotServerState.Certified]
+            )
+        )
+
+        changes += [(kind, row[id_name], row[label_name], row["votes"]) for row in rows]
+
+        if rows:
+            changes += [
+                ("vanity", vanity["redirect"], vanity["vanity_url"], 0)
+                for vanity in await self.mapleshade.pool.fetch(
+                    "SELECT redirect, vanity_url FROM vanity "
+                    "WHERE type = $1 AND redirect = ANY($2)",
+                    vanity_type,
+                    [row[id_name] for row in rows],
+                )
+            ]
+
+        self.apply(changes)
+
+    async def sync(self):
+        """Applies bot changes made since the last sync"""
+        if not self.synced_at:
+            return await self.reload()
+
+        rows = await tables.Bots.select(
+            tables.Bots.bot_id, tables.Bots.last_updated_at
+        ).where(tables.Bots.last_updated_at > self.synced_at - CHANGE_SYNC_OVERLAP)
+
+        if rows:
+            await self.update(models.TargetType.Bot, [row["bot_id"] for row in rows])
+            self.synced_at = max(
+                self.synced_at, *(row["last_updated_at"] for row in rows)
+            )
+
+    async def on_change(self, payloads: Optional[set[str]]):
+        """Applies bot/server changes from the change feed (None rebuilds everything)"""
+        if payloads is None:
+            return await self.reload()
+
+        for target_type, ids in ChangeFeed.targets(payloads).items():
+            if target_type in (models.TargetType.Bot, models.TargetType.Server):
+                await self.update(target_type, ids)
+
+    async def _refresh_loop(self):
+        """Syncs bot changes and periodically rebuilds everything"""
+        last_reload = time.monotonic()
+
+        while True:
+            await asyncio.sleep(SUGGEST_SYNC_INTERVAL)
+            try:
+                if time.monotonic() - last_reload >= SUGGEST_RELOAD_INTERVAL:
+                    await self.reload()
+                    last_reload = time.monotonic()
+                else:
+                    await self.sync()
+            except Exception as exc:
+                print(f"Failed to refresh the suggestion index: {exc}")
+
+    async def start(self):
+        """Builds the index and starts the refresh timer (called on startup)"""
+        await self.reload()
+
+        if not self.task:
+            self.task = asyncio.create_task(self._refresh_loop())
+
+    def stop(self):
+        """Stops the refresh timer (called on shutdown)"""
+        if self.task:
+            self.task.cancel()
+            self.task = None
+
+    def stats(self) -> dict[str, int]:
+        """Returns index size statistics for monitoring"""
+        return {
+            "items": len(self.items),
+            "entries": len(self.entries),
+            "lookups": self.lookups,
+        }
+
+
+class SearchCache:
+    """
+    LRU cache (with a TTL) of search responses keyed by the normalized search query
+
+    Cleared on every worker when the change feed reports listing, vote or name changes
+    of bots and servers, no matter where they are made. Other changes (like
+    descriptions) show up once the entries expire
+    """
+
+    __slots__ = ("entries", "size", "ttl", "hits", "misses", "evictions", "clears")
+
+    def __init__(
+        self, size: int = SEARCH_CACHE_SIZE, ttl: int | float = SEARCH_CACHE_TTL
+    ):
+        # Key -> (expiry, response)
+        self.entries: OrderedDict[tuple, tuple] = OrderedDict()
+        self.size = size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.clears = 0
+
+    @staticmethod
+    def normalize(query: models.SearchQuery) -> models.SearchQuery:
+        """
+        Normalizes a search query (search is case insensitive and tags are sets) so that
+        equivalent queries share a cache entry
+        """
+        return query.copy(
+            update={
+                "query": query.query.strip().lower(),
+                "tags": query.tags.copy(
+                    update={
+                        "bot": sorted(set(query.tags.bot)),
+                        "server": sorted(set(query.tags.server)),
+                    }
+                ),
+            }
+        )
+
+    @staticmethod
+    def key(query: models.SearchQuery) -> tuple:
+        """Returns the cache key of a normalized search query"""
+        return (
+            query.query,
+            tuple(query.tags.bot),
+            tuple(query.tags.server),
+            query.tags.bot_op,
+            query.tags.server_op,
+            tuple(query.guild_count),
+            tuple(query.votes),
+            query.sort,
+            query.limit,
+            query.bot_cursor,
+            query.server_cursor,
+        )
+
+    def get(self, key: tuple) -> Optional[models.SearchResponse]:
+        """Returns the cached response for a key (if any and not expired)"""
+        entry = self.entries.get(key)
+
+        if entry is None or entry[0] < time.monotonic():
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return entry[1]
+
+    def set(self, key: tuple, response: models.SearchResponse):
+        """Caches a response, evicting the least recently used entries if full"""
+        self.entries[key] = (time.monotonic() + self.ttl, response)
+        self.entries.move_to_end(key)
+
+        while len(self.entries) > self.size:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        """Drops all cached responses"""
+        self.entries.clear()
+        self.clears += 1
+
+    async def on_change(self, _payloads: Any):
+        """Drops all cached responses (change feed handler)"""
+        self.clear()
+
+    def stats(self) -> dict[str, int]:
+        """Returns hit/miss statistics for monitoring"""
+        return {
+            "entries": len(self.entries),
+            "size": self.size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "clears": self.clears,
+        }
+
+
+class VanityMap:
+    """
+    In-memory map of lowercased vanity codes to ``(type, redirect, vanity_url)``
+
+    Codes not in the map are looked up in the database (using the ``lower(vanity_url)``
+    index) and unknown codes are remembered for ``VANITY_NEGATIVE_TTL`` seconds.
+    Call ``invalidate`` after adding or removing a vanity
+    """
+
+    __slots__ = ("mapleshade", "codes", "misses", "task", "hits", "negative_hits", "db")
+
+    def __init__(self, mapleshade: "Mapleshade"):
+        self.mapleshade = mapleshade
+        self.codes: dict[str, tuple[int, int, str]] = {}
+        self.misses: dict[str, float] = {}  # Code -> expiry
+        self.task: Optional[asyncio.Task] = None
+        self.hits = 0
+        self.negative_hits = 0
+        self.db = 0
+
+    async def resolve(self, code: str) -> Optional[tuple[int, int, str]]:
+        """Returns the ``(type, redirect, vanity_url)`` of a vanity (case insensitive)"""
+        code = code.lower()
+
+        if (vanity := self.codes.get(code)) is not None:
+            self.hits += 1
+            return vanity
+
+        if self.misses.get(code, 0) > time.monotonic():
+            self.negative_hits += 1
+            return None
+
+        self.db += 1
+        row = await self.mapleshade.pool.fetchrow(
+            "SELECT type, redirect, vanity_url FROM vanity WHERE lower(vanity_url) = $1",
+            code,
+        )
+
+        if not row:
+            if len(self.misses) >= VANITY_NEGATIVE_SIZE:
+                self.misses.clear()
+            self.misses[code] = time.monotonic() + VANITY_NEGATIVE_TTL
+            return None
+
+        self.codes[code] = (row["type"], row["redirect"], row["vanity_url"])
+        return self.codes[code]
+
+    def drop(self, code: str):
+        """Forgets a code on this worker (it is looked up again on next use)"""
+        self.codes.pop(code, None)
+        self.misses.pop(code, None)
+
+    async def invalidate(self, code: str):
+        """Forgets a code on all workers"""
+        await self.mapleshade.cache.remove(VANITY_INVALIDATE_PREFIX + code.lower())
+
+    async def reload(self):
+        """Reloads every vanity from the database"""
+        rows = await self.mapleshade.pool.fetch(
+            "SELECT type, redirect, vanity_url FROM vanity"
+        )
+
+        self.codes = {
+            row["vanity_url"].lower(): (row["type"], row["redirect"], row["vanity_url"])
+            for row in rows
+            if row["vanity_url"]
+        }
+        self.misses = {}
+
+    async def _refresh_loop(self):
+        """Reloads the map every VANITY_RELOAD_INTERVAL seconds"""
+        while True:
+            await asyncio.sleep(VANITY_RELOAD_INTERVAL)
+            try:
+                await self.reload()
+            except Exception as exc:
+                print(f"Failed to reload the vanity map: {exc}")
+
+    async def start(self):
+        """Loads the map and starts the reload timer (called on startup)"""
+        await self.reload()
+
+        if not self.task:
+            self.task = asyncio.create_task(self._refresh_loop())
+
+    def stop(self):
+        """Stops the reload timer (called on shutdown)"""
+        if self.task:
+            self.task.cancel()
+            self.task = None
+
+    def stats(self) -> dict[str, int]:
+        """Returns hit/miss statistics for monitoring"""
+        return {
+            "codes": len(self.codes),
+            "negative": len(self.misses),
+            "hits": self.hits,
+            "negative_hits": self.negative_hits,
+            "db": self.db,
+        }
+
+
+class AuthCache:
+    """
+    LRU cache (with a TTL) of the API tokens of users, bots and servers
+
+    Only a digest of each token is kept and tokens are still compared in constant time.
+    Lookups that find nothing are not cached. The change feed drops tokens and user
+    states that changed, so regenerating a token or banning a user anywhere takes effect
+    within ``CHANGE_FEED_DELAY``. ``invalidate`` drops one on all workers right away
+    """
+
+    __slots__ = (
+        "entries",
+        "compat",
+        "size",
+        "ttl",
+        "mapleshade",
+        "generation",
+        "digests",
+        "rehashed",
+        "task",
+        "hits",
+        "misses",
+        "evictions",
+        "invalidations",
+        "plaintext_lookups",
+    )
+
+    def __init__(
+        self,
+        mapleshade: "Mapleshade",
+        size: int = AUTH_CACHE_SIZE,
+        ttl: int | float = AUTH_CACHE_TTL,
+    ):
+        self.mapleshade = mapleshade
+        # (target type, id) -> (expiry, token digest, global banned)
+        self.entries: OrderedDict[tuple[int, int], tuple[float, bytes, bool]] = (
+            OrderedDict()
+        )
+        # Token digest -> bot ID, for the Authorization (compat) header
+        self.compat: OrderedDict[bytes, int] = OrderedDict()
+        self.size = size
+        self.ttl = ttl
+        # Bumped on every invalidation so lookups racing one do not cache old tokens
+        self.generation = 0
+        # Whether bots.api_token_digest exists and whether every token has been hashed
+        # yet, checked until both are true (see ``check_digests``)
+        self.digests = False
+        self.rehashed = False
+        self.task: Optional[asyncio.Task] = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.plaintext_lookups = 0
+
+    @staticmethod
+    def digest(token: str) -> bytes:
+        """Returns the digest of a token that is kept in the cache"""
+        return hashlib.sha256(token.encode()).digest()
+
+    def _store(self, cache: OrderedDict, key: Any, value: Any):
+        """Adds an entry to ``cache``, evicting the least recently used entries if full"""
+        cache[key] = value
+        cache.move_to_end(key)
+
+        while len(cache) > self.size:
+            cache.popitem(last=False)
+            self.evictions += 1
+
+    async def fetch(
+        self, auth_type: models.TargetType, id: int
+    ) -> Optional[tuple[bytes, bool]]:
+        """Returns the ``(token digest, global banned)`` of a user/bot/server (if any)"""
+        key = (auth_type.value, id)
+        entry = self.entries.get(key)
+
+        if entry is not None and entry[0] > time.monotonic():
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return entry[1], entry[2]
+
+        self.misses += 1
+        generation = self.generation
+
+        if auth_type == models.TargetType.User:
+            row = (
+                await tables.Users.select(tables.Users.api_token, tables.Users.state)
+                .where(tables.Users.user_id == id)
+                .first()
+            )
+        elif auth_type == models.TargetType.Bot:
+            row = (
+                await tables.Bots.select(tables.Bots.api_token)
+                .where(tables.Bots.bot_id == id)
+                .first()
+            )
+        elif auth_type == models.TargetType.Server:
+            row = (
+                await tables.Servers.select(tables.Servers.api_token)
+                .where(tables.Servers.guild_id == id)
+                .first()
+            )
+        else:
+            return None
+
+        if not row:
+            return None
+
+        digest = self.digest(row["api_token"])
+        banned = row.get("state") == models.UserState.GlobalBan.value
+
+        if generation == self.generation:
+            self._store(
+                self.entries, key, (time.monotonic() + self.ttl, digest, banned)
+            )
+
+        return digest, banned
+
+    async def fetch_compat(self, token: str) -> Optional[int]:
+        """Returns the ID of the bot with an API token (if any)"""
+        digest = self.digest(token)
+
+        if (bot_id := self.compat.get(digest)) is not None:
+            # Make sure the token is still the bot's token
+            entry = await self.fetch(models.TargetType.Bot, bot_id)
+
+            if entry and secrets.compare_digest(entry[0], digest):
+                self.compat.move_to_end(digest)
+                return bot_id
+
+            self.compat.pop(digest, None)
+
+        row = None
+
+        if self.digests:
+            row = await self.mapleshade.pool.fetchrow(
+                "SELECT bot_id FROM bots WHERE api_token_digest = $1", digest
+            )
+
+        if not row and not self.rehashed:
+            # Not every token has a digest yet, so this has to scan the bots table
+            self.plaintext_lookups += 1
+            row = (
+                await tables.Bots.select(tables.Bots.bot_id)
+                .where(tables.Bots.api_token == token)
+                .first()
+            )
+
+        if not row:
+            return None
+
+        self._store(self.compat, digest, row["bot_id"])
+        return row["bot_id"]
+
+    async def check_digests(self):
+        """
+        Checks whether bot tokens can be looked up by digest. Until every token is
+        hashed, compat lookups also fall back to the plaintext token
+        """
+        try:
+            self.rehashed = await self.mapleshade.pool.fetchval(
+                "SELECT NOT EXISTS (SELECT 1 FROM bots WHERE api_token_digest IS NULL)"
+            )
+            self.digests = True
+        except asyncpg.UndefinedColumnError:
+            self.digests = self.rehashed = False
+
+    async def _check_loop(self):
+        """Rechecks the digest migration until it has finished"""
+        while not self.rehashed:
+            await asyncio.sleep(AUTH_DIGEST_CHECK_INTERVAL)
+            try:
+                await self.check_digests()
+            except Exception as exc:
+                print(f"Failed to check bot token digests: {exc}")
+
+        self.task = None
+
+    async def start(self):
+        """
+        Checks the digest migration and keeps rechecking it while it is not finished
+        (called on startup), so running the migration does not need a restart
+        """
+        await self.check_digests()
+
+        if not self.rehashed and not self.task:
+            self.task = asyncio.create_task(self._check_loop())
+
+    def stop(self):
+        """Stops rechecking the digest migration (called on shutdown)"""
+        if self.task:
+            self.task.cancel()
+            self.task = None
+
+    def drop(self, key: str):
+        """Forgets the token of a ``"{prefix}{target type}:{id}"`` key on this worker"""
+        auth_type, id = key[len(AUTH_INVALIDATE_PREFIX) :].split(":")
+
+        self.generation += 1
+        self.invalidations += 1
+        self.entries.pop((int(auth_type), int(id)), None)
+
+    async def on_change(self, payloads: Optional[set[str]]):
+        """Forgets changed tokens from the change feed (None forgets every token)"""
+        self.generation += 1
+
+        if payloads is None:
+            self.invalidations += len(self.entries)
+            self.entries.clear()
+            return
+
+        for target_type, ids in ChangeFeed.targets(payloads).items():
+            for id in ids:
+                if self.entries.pop((target_type.value, id), None):
+                    self.invalidations += 1
+
+    async def invalidate(self, auth_type: models.TargetType, id: int):
+        """Forgets the token of a user/bot/server on all workers"""
+        await self.mapleshade.cache.remove(
+            f"{AUTH_INVALIDATE_PREFIX}{auth_type.value}:{id}"
+        )
+
+    def stats(self) -> dict[str, int | float | bool]:
+        """Returns hit/miss statistics for monitoring"""
+        lookups = self.hits + self.misses
+
+        return {
+            "entries": len(self.entries),
+            "compat_entries": len(self.compat),
+            "size": self.size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "plaintext_lookups": self.plaintext_lookups,
+            "rehashed": self.rehashed,
+        }
+
+
 class SQLFiles:
     """SQL file data storage"""
 
@@ -59,6 +2040,7 @@ class SQLFiles:
         self.search_servers = self.load_sql("search_servers")
         self.search_profiles = self.load_sql("search_profiles")
         self.search_packs = self.load_sql("search_packs")
+        self.suggest_vanities = self.load_sql("suggest_vanities")
 
 
 class Mapleshade:
@@ -76,11 +2058,28 @@ class Mapleshade:
         "utc",
         "sql",
         "pool",  # Raw SQL pool
+        "silverpelt",  # Pooled Silverpelt session
+        "silverpelt_stats",
+        "users",  # Coalescing Silverpelt user loader
+        "meta",  # Tag/feature registry
+        "index",  # Pre-encoded index snapshots
+        "random",  # Random bot/server sampler
+        "search_cache",
+        "suggest",  # Search-as-you-type prefix index
+        "vanity",  # Vanity code map
+        "auth_cache",
+        "changes",  # Database change notifications
+        "role_perms",  # Role -> permission
+        "perms_bytes",  # Pre-serialized permission list
+        "sanitize_cache",
+        "sanitize_pool",  # Process pool for large sanitize jobs
+        "sanitize_stats",
+        "extra_stats",  # Stats registered by other modules (e.g. websockets)
     ]
 
     def __init__(self):
-        # In memory cache for bot data
-        self.cache = Cache()
+        # Shared cache (in-process L1 in front of redis)
+        self.cache = TieredCache(redis_from_config())
 
         self.yaml = yaml
 
@@ -98,6 +2097,16 @@ class Mapleshade:
         # Ensure perms are sorted by index in decreasing order (10, 9, 8)
         self.perms = dict(sorted(self.perms.items(), key=lambda item: item[1].index, reverse=True))
 
+        # Role -> highest permission with that role
+        self.role_perms: dict[str, models.Permission] = {}
+
+        for perm in self.perms.values():
+            for role in perm.roles:
+                self.role_perms.setdefault(role, perm)
+
+        # Perms only change with the config, so serialize them once
+        self.perms_bytes = orjson.dumps(models.PermissionList(perms=self.perms).dict())
+
         # CMark options
         self.cmark_opts = (
             # cmarkgfmOptions.CMARK_OPT_LIBERAL_HTML_TAG |
@@ -159,6 +2168,43 @@ class Mapleshade:
         self.utc = pytz.UTC
         self.sql = SQLFiles()
         self.pool: asyncpg.Pool | None = None  # Initially none
+        self.silverpelt: aiohttp.ClientSession | None = None  # Opened on startup
+        self.silverpelt_stats: dict[str, int] = {
+            "requests": 0,
+            "errors": 0,
+            "timeouts": 0,
+            "in_flight": 0,
+            "peak_in_flight": 0,
+        }
+        self.users = SilverUserLoader(self)
+        self.meta = ListMetaCache()
+        self.index = IndexSnapshots(self)
+        self.random = RandomSampler(self)
+        self.search_cache = SearchCache()
+        self.suggest = SuggestIndex(self)
+        self.vanity = VanityMap(self)
+        self.auth_cache = AuthCache(self)
+        self.changes = ChangeFeed(self)
+
+        self.changes.add_handler(LISTING_CHANGES_CHANNEL, self.random.on_change)
+        self.changes.add_handler(LISTING_CHANGES_CHANNEL, self.search_cache.on_change)
+        self.changes.add_handler(LISTING_CHANGES_CHANNEL, self.suggest.on_change)
+        self.changes.add_handler(AUTH_CHANGES_CHANNEL, self.auth_cache.on_change)
+
+        self.cache.add_listener(
+            VANITY_INVALIDATE_PREFIX,
+            lambda key: self.vanity.drop(key[len(VANITY_INVALIDATE_PREFIX) :]),
+        )
+        self.cache.add_listener(AUTH_INVALIDATE_PREFIX, self.auth_cache.drop)
+        self.sanitize_cache = SanitizeCache()
+        self.sanitize_pool: ProcessPoolExecutor | None = None  # Started on startup
+        self.sanitize_stats: dict[str, int] = {
+            "inline": 0,
+            "offloaded": 0,
+            "queue_depth": 0,
+            "peak_queue_depth": 0,
+        }
+        self.extra_stats: dict[str, dict[str, Any]] = {}
 
     def compare_dt(self, dt1: datetime, dt2: datetime):
         """Return True if dt1 is greater than dt2. Handles both naive and aware datetimes"""
@@ -168,21 +2214,32 @@ class Mapleshade:
 
     async def guppy(self, user_id: int) -> models.Permission:
         """Guppy: (Get User Permissions Pretty Please You!"""
+        name = await self.cache.get_or_compute(
+            f"{PERMS_CACHE_PREFIX}{user_id}",
+            functools.partial(self._resolve_perm, user_id),
+            expiry=PERMS_CACHE_TTL,
+        )
+
+        return self.perms.get(name, self.perms["default"])
+
+    async def _resolve_perm(self, user_id: int) -> str:
+        """Returns the name of the highest permission a user has a role for"""
         try:
-            user_roles: list[str] = [
+            user_roles = {
                 str(v)
                 for v in await self.silverpelt_req(
                     f"roles/{self.config['servers']['main']}/{user_id}"
                 )
-            ]
+            }
         except SilverNoData:
-            return self.perms["default"]
+            return "default"
 
-        for perm in self.perms.values():
-            if any(role in user_roles for role in perm.roles):
-                return perm
+        perms = [self.role_perms[role] for role in self.role_perms.keys() & user_roles]
+
+        if not perms:
+            return "default"
 
-        return self.perms["default"]
+        return max(perms, key=lambda perm: perm.index).name
 
     def parse_dict(self, d: dict | object) -> dict | object:
         """Parse dict for handling bigints in DDR's etc"""
@@ -200,101 +2257,181 @@ class Mapleshade:
         else:
             return d
 
+    def start_sanitize_pool(self):
+        """Starts the sanitizer process pool with the bleach/cmark config preloaded in each worker"""
+        if self.sanitize_pool:
+            return
+
+        self.sanitize_pool = ProcessPoolExecutor(
+            max_workers=SANITIZE_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=sanitizer.init_worker,
+            initargs=(
+                self.sanitize_tags,
+                self.sanitize_attrs,
+                self.cmark_opts,
+                self.cmark_exts,
+            ),
+        )
+
+    def stop_sanitize_pool(self):
+        """Stops the sanitizer process pool"""
+        if self.sanitize_pool:
+            self.sanitize_pool.shutdown(wait=False, cancel_futures=True)
+            self.sanitize_pool = None
+
     def sanitize(
         self,
         s: str,
         long_description_type: models.LongDescriptionType = models.LongDescriptionType.MarkdownServerSide,
     ) -> str:
-        """Sanitize a string for use in HTML/MD accordingly"""
-        if long_description_type == models.LongDescriptionType.MarkdownServerSide:
-            # First parse markdown
-            s = cmarkgfm.markdown_to_html_with_extensions(
-                s, options=self.cmark_opts, extensions=self.cmark_exts
-            )
-        return bleach.clean(
+        """Sanitize a string for use in HTML/MD accordingly (cached by content hash)"""
+        key = self.sanitize_cache.key(s, long_description_type)
+
+        if (html := self.sanitize_cache.get(key)) is not None:
+            return html
+
+        self.sanitize_stats["inline"] += 1
+
+        html = sanitizer.render(
             s,
+            long_description_type == models.LongDescriptionType.MarkdownServerSide,
             tags=self.sanitize_tags,
-            attributes=self.sanitize_attrs,
+            attrs=self.sanitize_attrs,
+            cmark_opts=self.cmark_opts,
+            cmark_exts=self.cmark_exts,
         )
 
-    async def bot(self, bot_id: int) -> Optional[models.Bot]:
-        """Returns a bot from the database"""
-        bot = await tables.Bots.select().where(tables.Bots.bot_id == bot_id).first()
+        self.sanitize_cache.set(key, html)
+        return html
 
-        if not bot:
-            return None
+    async def sanitize_async(
+        self,
+        s: str,
+        long_description_type: models.LongDescriptionType = models.LongDescriptionType.MarkdownServerSide,
+    ) -> str:
+        """
+        Same as ``sanitize`` but large inputs are rendered in the sanitizer process pool
+        so they do not block the event loop
+        """
+        if len(s) < SANITIZE_INLINE_THRESHOLD or not self.sanitize_pool:
+            return self.sanitize(s, long_description_type)
+
+        key = self.sanitize_cache.key(s, long_description_type)
+
+        if (html := self.sanitize_cache.get(key)) is not None:
+            return html
+
+        stats = self.sanitize_stats
+        stats["offloaded"] += 1
+        stats["queue_depth"] += 1
+        stats["peak_queue_depth"] = max(stats["peak_queue_depth"], stats["queue_depth"])
+
+        pool = self.sanitize_pool
 
-        # Get bot user
         try:
-            bot["user"] = await self.silverpelt_req(f"users/{bot_id}")
-        except SilverNoData:
+            html = await asyncio.get_running_loop().run_in_executor(
+                pool,
+                sanitizer.render_in_worker,
+                s,
+                long_description_type == models.LongDescriptionType.MarkdownServerSide,
+            )
+        except BrokenProcessPool:
+            # A worker died, restart the pool and render this one inline. Other jobs on
+            # the same pool fail together, only the first one may restart it (or jobs
+            # already queued on the new pool would be cancelled)
+            if self.sanitize_pool is pool:
+                print("Sanitizer process pool broke, restarting it")
+                self.stop_sanitize_pool()
+                self.start_sanitize_pool()
+            return self.sanitize(s, long_description_type)
+        finally:
+            stats["queue_depth"] -= 1
+
+        self.sanitize_cache.set(key, html)
+        return html
+
+    async def bot(self, bot_id: int) -> Optional[models.Bot]:
+        """
+        Returns a bot from the database
+
+        This runs a fixed number of queries (bot, owners, action logs and commands) over one pooled
+        connection, no matter how many tags/features/owners the bot has. Tags and features come from
+        the in-memory ``ListMetaCache``
+        """
+        async with self.pool.acquire() as conn:
+            bot = await conn.fetchrow("SELECT * FROM bots WHERE bot_id = $1", bot_id)
+
+            if not bot:
+                return None
+
+            bot = dict(bot)
+
+            owners = await conn.fetch(
+                "SELECT owner, main FROM bot_owner WHERE bot_id = $1", bot_id
+            )
+
+            # Get bot user and owners in one round trip while the rest of the queries run
+            users_task = asyncio.create_task(
+                self.users.load_many([bot_id] + [owner["owner"] for owner in owners])
+            )
+
+            try:
+                # Add action logs
+                bot["action_logs"] = self.parse_records(
+                    await conn.fetch(
+                        "SELECT * FROM user_bot_logs WHERE bot_id = $1", bot_id
+                    )
+                )
+
+                bot["commands"] = self.parse_records(
+                    await conn.fetch(
+                        "SELECT * FROM bot_commands WHERE bot_id = $1", bot_id
+                    )
+                )
+            except BaseException:
+                users_task.cancel()
+                raise
+
+        users = await users_task
+
+        if not (bot_user := users.get(bot_id)):
             return None
 
-        owners = await tables.BotOwner.select(
-            tables.BotOwner.owner, tables.BotOwner.main
-        ).where(tables.BotOwner.bot_id == bot_id)
+        bot["user"] = bot_user
 
         owners_list: list = []
 
         for owner in owners:
-            try:
-                owner_user = await self.silverpelt_req(f"users/{owner['owner']}")
-            except SilverNoData:
+            if not (owner_user := users.get(owner["owner"])):
                 continue
 
             owners_list.append(models.Owner(user=owner_user, main=owner["main"]))
 
         bot["owners"] = owners_list
 
-        # Add action logs
-        bot["action_logs"] = (
-            await tables.UserBotLogs.select().where(tables.UserBotLogs.bot_id == bot_id)
-        ) or []
-
         # Fix extra_links not being a dict (despite being JSONB, this is just stupid)
         bot["extra_links"] = orjson.loads(bot["extra_links"])
 
         # Sanitize long description
         bot["long_description_raw"] = bot["long_description"]
-        bot["long_description"] = self.sanitize(bot["long_description"])
+        bot["long_description"] = await self.sanitize_async(bot["long_description"])
 
         # Sanitize CSS
         bot["css_raw"] = bot["css"]
-        bot["css"] = self.sanitize(
+        bot["css"] = await self.sanitize_async(
             "<style>" + (bot["css"] or "") + "</style>", models.LongDescriptionType.Html
         )
 
-        # Tags
-        tags = []
-
-        for tag in bot["tags"]:
-            tag_data = (
-                await tables.BotListTags.select()
-                .where(tables.BotListTags.id == tag)
-                .first()
-            )
-            tags.append(tag_data)
-
-        bot["tags"] = models.Tag.to_list(tags)
-
-        # Features
-        features = []
-        if bot["features"]:
-            for feature in bot["features"]:
-                feature_data = (
-                    await tables.Features.select()
-                    .where(tables.Features.id == feature)
-                    .first()
-                )
-                features.append(feature_data)
-
-            bot["features"] = models.Feature.to_list(features)
-        else:
-            bot["features"] = []
-
-        bot["commands"] = await tables.BotCommands.select().where(
-            tables.BotCommands.bot_id == bot_id
-        )
+        # Tags and features (keeping the order set on the bot)
+        bot["tags"] = [
+            self.meta.bot_tags[tag] for tag in bot["tags"] if tag in self.meta.bot_tags
+        ]
+        bot["features"] = [
+            self.meta.features[feature]
+            for feature in bot["features"] or []
+            if feature in self.meta.features
+        ]
 
         # Pydantic memes
         bot_m = models.Bot(**bot)
@@ -312,128 +2449,264 @@ class Mapleshade:
 
         return models.User(**user)
 
+    async def open_silverpelt(self):
+        """Opens the pooled keep-alive Silverpelt session (called on startup)"""
+        if self.silverpelt and not self.silverpelt.closed:
+            return
+
+        self.silverpelt = aiohttp.ClientSession(
+            base_url=SILVERPELT_URL,
+            connector=aiohttp.TCPConnector(
+                limit=SILVERPELT_POOL_SIZE,
+                keepalive_timeout=SILVERPELT_KEEPALIVE,
+            ),
+            timeout=SILVERPELT_TIMEOUT,
+            headers={"Content-Type": "application/json"},
+        )
+
+    async def close_silverpelt(self):
+        """Closes the pooled Silverpelt session (called on shutdown)"""
+        if self.silverpelt:
+            await self.silverpelt.close()
+            self.silverpelt = None
+
+    def silverpelt_pool_stats(self) -> dict[str, Any]:
+        """Returns statistics about the Silverpelt connection pool"""
+        return self.silverpelt_stats | {
+            "open": bool(self.silverpelt and not self.silverpelt.closed),
+            "limit": SILVERPELT_POOL_SIZE,
+        }
+
+    def stats(self) -> dict[str, Any]:
+        """Returns internal statistics for monitoring"""
+        return {
+            "silverpelt": self.silverpelt_pool_stats(),
+            "cache": self.cache.stats(),
+            "user_loader": self.users.stats,
+            "list_meta": {"version": self.meta.version},
+            "index": self.index.stats(),
+            "random": self.random.stats(),
+            "search_cache": self.search_cache.stats(),
+            "suggest": self.suggest.stats(),
+            "vanity": self.vanity.stats(),
+            "auth_cache": self.auth_cache.stats(),
+            "changes": self.changes.stats(),
+            "sanitize_cache": self.sanitize_cache.stats(),
+            "sanitize_pool": self.sanitize_stats
+            | {"open": self.sanitize_pool is not None, "workers": SANITIZE_WORKERS},
+        } | self.extra_stats
+
     async def silverpelt_req(
         self, endpoint: str, *, method: str = "GET", data: BaseModel = None
     ) -> dict:
-        """Makes a request to Silverpelt"""
+        """Makes a request to Silverpelt over the pooled session"""
         if data:
             body = orjson.dumps(data.dict())
         else:
             body = None
 
-        async with aiohttp.ClientSession() as session:
-            try:
-                async with session.request(
-                    method,
-                    f"http://127.0.0.1:3030/{endpoint}",
-                    data=body,
-                    headers={"Content-Type": "application/json"},
-                ) as resp:
-                    if not resp.ok:
-                        body = await resp.read()
-                        print(body)
-                        raise SilverRespError(endpoint, data, resp)
-                    body_bytes = await resp.read()
-                    bytes: dict = msgpack.unpackb(body_bytes)
-
-                    if not bytes:
-                        raise SilverNoData(
-                            f"Silverpelt returned no data on {endpoint} with data {data}"
-                        )
+        if not self.silverpelt or self.silverpelt.closed:
+            # Not started via the app (e.g. a task or script), open it now
+            await self.open_silverpelt()
 
-                    return bytes
-            except aiohttp.ClientConnectorError:
-                raise SilverException("Could not connect to Silverpelt")
+        stats = self.silverpelt_stats
+        stats["requests"] += 1
+        stats["in_flight"] += 1
+        stats["peak_in_flight"] = max(stats["peak_in_flight"], stats["in_flight"])
 
-    async def to_snippet(self, data: list[dict]) -> models.Snippet:
-        """Converts a dict to a snippet (bots/servers only). Profiles should use to_profile_snippet"""
-        snippet = []
-        for entity in data:
-            if entity.get("bot_id"):
-                # This is a bot
-                try:
-                    entity["user"] = await self.silverpelt_req(
-                        f"users/{entity['bot_id']}"
+        try:
+            async with self.silverpelt.request(
+                method,
+                f"/{endpoint}",
+                data=body,
+            ) as resp:
+                if not resp.ok:
+                    stats["errors"] += 1
+                    body = await resp.read()
+                    print(body)
+                    raise SilverRespError(endpoint, data, resp)
+                body_bytes = await resp.read()
+                bytes: dict = msgpack.unpackb(body_bytes)
+
+                if not bytes:
+                    raise SilverNoData(
+                        f"Silverpelt returned no data on {endpoint} with data {data}"
                     )
-                except:
-                    print(f"Failed to get user for bot {entity['bot_id']}")
-                    continue
-            elif entity.get("guild_id"):
-                # This is a guild
-                try:
-                    guild_data = (
-                        await tables.Servers.select(
-                            tables.Servers.name_cached,
-                            tables.Servers.avatar_cached,
-                        )
-                        .where(tables.Servers.guild_id == entity["guild_id"])
-                        .first()
+
+                return bytes
+        except aiohttp.ClientConnectorError:
+            stats["errors"] += 1
+            raise SilverException("Could not connect to Silverpelt")
+        except asyncio.TimeoutError:
+            stats["timeouts"] += 1
+            raise SilverException(f"Silverpelt timed out on {endpoint}")
+        finally:
+            stats["in_flight"] -= 1
+
+    async def gather_bounded(
+        self, coros: list[Awaitable], *, limit: int = SNIPPET_CONCURRENCY
+    ) -> list:
+        """Runs coroutines concurrently (at most ``limit`` at a time) returning their results in input order"""
+        sem = asyncio.Semaphore(limit)
+
+        async def _run(coro: Awaitable):
+            """Runs a coroutine once the semaphore allows it"""
+            async with sem:
+                return await coro
+
+        return await asyncio.gather(*[_run(coro) for coro in coros])
+
+    async def _resolve_snippet(
+        self, entity: dict, users: Optional[dict[int, dict]] = None
+    ) -> Optional[models.Snippet]:
+        """
+        Resolves the user of a single bot/server snippet, returning None on failure.
+        ``users`` is an optional map of already loaded users (from ``users.load_many``)
+        """
+        if entity.get("bot_id"):
+            # This is a bot
+            try:
+                if users is not None:
+                    entity["user"] = users[int(entity["bot_id"])]
+                else:
+                    entity["user"] = await self.users.load(entity["bot_id"])
+            except:
+                print(f"Failed to get user for bot {entity['bot_id']}")
+                return None
+        elif entity.get("guild_id"):
+            # This is a guild
+            try:
+                guild_data = (
+                    await tables.Servers.select(
+                        tables.Servers.name_cached,
+                        tables.Servers.avatar_cached,
                     )
+                    .where(tables.Servers.guild_id == entity["guild_id"])
+                    .first()
+                )
 
-                    entity["user"] = {
-                        "id": entity["guild_id"],
-                        "username": guild_data["name_cached"],
-                        "disc": "0001",
-                        "avatar": guild_data["avatar_cached"],
-                        "bot": False,
-                        "system": False,
-                        "status": 0,
-                        "flags": 0,
-                    }
-                except:
-                    print(f"Failed to get guild for {entity['guild_id']}")
-                    continue
-            else:
-                raise ValueError("Invalid entity")
-            snippet.append(models.Snippet(**entity))
+                entity["user"] = {
+                    "id": entity["guild_id"],
+                    "username": guild_data["name_cached"],
+                    "disc": "0001",
+                    "avatar": guild_data["avatar_cached"],
+                    "bot": False,
+                    "system": False,
+                    "status": 0,
+                    "flags": 0,
+                }
+            except:
+                print(f"Failed to get guild for {entity['guild_id']}")
+                return None
+        else:
+            raise ValueError("Invalid entity")
+        return models.Snippet(**entity)
+
+    async def build_index(self, target_type: models.TargetType) -> models.Index:
+        """Builds the index (top voted, new and certified snippets) of bots or servers"""
+        if target_type == models.TargetType.Bot:
+            table, cols = tables.Bots, models.BOT_SNIPPET_COLS
+        else:
+            table, cols = tables.Servers, models.SERVER_SNIPPET_COLS
+
+        top_voted, new, certified = await asyncio.gather(
+            table.select(*cols)
+            .where(table.state == models.BotServerState.Approved)
+            .order_by(table.votes, ascending=False)
+            .limit(12),
+            table.select(*cols)
+            .where(table.state == models.BotServerState.Approved)
+            .order_by(table.created_at, ascending=False)
+            .limit(12),
+            table.select(*cols)
+            .where(table.state == models.BotServerState.Certified)
+            .order_by(table.votes, ascending=False)
+            .limit(12),
+        )
+
+        return models.Index(
+            top_voted=await self.to_snippet(top_voted),
+            new=await self.to_snippet(new),
+            certified=await self.to_snippet(certified),
+        )
 
-        return snippet
+    async def to_snippet(
+        self, data: list[dict], *, users: Optional[dict[int, dict]] = None
+    ) -> list[models.Snippet]:
+        """Converts a dict to a snippet (bots/servers only). Profiles should use to_profile_snippet"""
+        snippets = await self.gather_bounded(
+            [self._resolve_snippet(entity, users) for entity in data]
+        )
+
+        return [snippet for snippet in snippets if snippet]
+
+    async def _resolve_profile_snippet(
+        self, entity: dict, users: Optional[dict[int, dict]] = None
+    ) -> Optional[models.ProfileSnippet]:
+        """Resolves the user of a single profile snippet, returning None on failure"""
+        try:
+            if users is not None:
+                entity["user"] = users[int(entity["user_id"])]
+            else:
+                entity["user"] = await self.users.load(entity["user_id"])
+        except:
+            print(f"Failed to get user for profile {entity['user_id']}")
+            return None
+        return models.ProfileSnippet(**entity)
 
-    async def to_profile_snippet(self, data: list[dict]) -> models.ProfileSnippet:
+    async def to_profile_snippet(
+        self, data: list[dict], *, users: Optional[dict[int, dict]] = None
+    ) -> list[models.ProfileSnippet]:
         """Converts a dict to a snippet (profiles only)"""
-        snippet = []
-        for entity in data:
-            try:
-                entity["user"] = await self.silverpelt_req(f"users/{entity['user_id']}")
-            except:
-                print(f"Failed to get user for profile {entity['user_id']}")
-                continue
-            snippet.append(models.ProfileSnippet(**entity))
+        snippets = await self.gather_bounded(
+            [self._resolve_profile_snippet(entity, users) for entity in data]
+        )
 
-        return snippet
+        return [snippet for snippet in snippets if snippet]
 
-    async def resolve_packs(self, data: list[dict]) -> list[models.BotPack]:
+    async def resolve_packs(
+        self, data: list[dict], *, users: Optional[dict[int, dict]] = None
+    ) -> list[models.BotPack]:
         """Resolves a list of bot packs"""
         packs = []
+
+        # Resolve all pack bots and owners in one round trip
+        if users is None:
+            users = await self.users.load_many(
+                [bot for pack in data for bot in pack["bots"]]
+                + [pack["owner"] for pack in data]
+            )
+
+        # And all member descriptions in one query
+        descriptions = {
+            row["bot_id"]: row["description"]
+            for row in await self.pool.fetch(
+                "SELECT bot_id, description FROM bots WHERE bot_id = ANY($1)",
+                list({int(bot) for pack in data for bot in pack["bots"]}),
+            )
+        }
+
         for pack in data:
             resolved_bots = []
 
             for bot in pack["bots"]:
-                description = (
-                    await tables.Bots.select(tables.Bots.description)
-                    .where(tables.Bots.bot_id == bot)
-                    .first()
-                )
-
-                if description:
-                    try:
-                        user = await self.silverpelt_req(f"users/{bot}")
-                    except:
+                if (description := descriptions.get(int(bot))) is not None:
+                    if not (user := users.get(int(bot))):
                         print(f"Failed to get user for bot {bot}")
                         continue
                     resolved_bots.append(
                         models.ResolvedPackBot(
                             user=user,
-                            description=description["description"],
+                            description=description,
                         )
                     )
 
-            try:
-                pack["owner"] = await self.silverpelt_req(f"users/{pack['owner']}")
-            except:
+            if not (owner := users.get(int(pack["owner"]))):
                 print(f"Failed to get user for pack owner {pack['owner']}")
                 continue
 
+            pack["owner"] = owner
+
             packs.append(models.BotPack(**pack, resolved_bots=resolved_bots))
 
         return packs
@@ -534,65 +2807,208 @@ class Mapleshade:
         else:
             return records
 
+    @staticmethod
+    def search_id(query: str) -> int:
+        """Returns the ID a search query is (or -1 if it is not an ID)"""
+        query = query.strip()
+
+        if query.isascii() and query.isdigit() and int(query) < 2**63:
+            return int(query)
+
+        return -1
+
+    @staticmethod
+    def search_sql(
+        sql: str,
+        query: models.SearchQuery,
+        table: str,
+        id_col: str,
+        name_col: str,
+        op: str,
+        cursor: Optional[str],
+        args: list,
+    ) -> str:
+        """
+        Fills in the tag operator, order, keyset cursor and limit of a bot/server search,
+        appending the arguments they need to ``args``. One more row than ``query.limit``
+        is fetched to know if there is a next page
+        """
+        cursor_sql = ""
+
+        if query.sort == "relevance":
+            args.append(query.query)
+            order = (
+                f"greatest(word_similarity(${len(args)}, {table}.{name_col}), "
+                f"word_similarity(${len(args)}, {table}.description)) DESC, "
+                f"{table}.votes DESC"
+            )
+        else:
+            # NULL counts (the columns are nullable) sort and page as 0, a NULL in the
+            # row comparison below would leave the row out of every later page
+            keys = (
+                f"coalesce({table}.votes, 0)",
+                f"coalesce({table}.guild_count, 0)",
+                f"{table}.{id_col}",
+            )
+            order = ", ".join(f"{key} DESC" for key in keys)
+
+            if cursor:
+                args += [int(part) for part in cursor.split(".")]
+                cursor_sql = (
+                    f"AND ({', '.join(keys)}) "
+                    f"< (${len(args) - 2}, ${len(args) - 1}, ${len(args)})"
+                )
+
+        args.append(query.limit + 1)
+
+        return (
+            sql.replace("{op}", op)
+            .replace("{order}", order)
+            .replace("{cursor}", cursor_sql)
+            .replace("{limit}", f"${len(args)}")
+        )
+
+    @staticmethod
+    def search_page(
+        records: list[dict], query: models.SearchQuery, id_col: str
+    ) -> tuple[list[dict], Optional[str]]:
+        """Cuts the extra row off a bot/server search, returning the page and the next cursor"""
+        if len(records) <= query.limit:
+            return records, None
+
+        records = records[: query.limit]
+
+        if query.sort == "relevance":
+            return records, None
+
+        last = records[-1]
+        return records, models.SearchQuery.make_cursor(
+            last["votes"] or 0, last["guild_count"] or 0, last[id_col]
+        )
+
+    async def search_fetch(self, skip: bool, sql: str, *args: Any) -> list[dict]:
+        """Runs one search query (returning no rows if ``skip`` is set)"""
+        if skip:
+            return []
+
+        return self.parse_records(await self.pool.fetch(sql, *args))
+
+    async def cached_search(self, query: models.SearchQuery) -> models.SearchResponse:
+        """Searches for a normalized SearchQuery, using the search cache"""
+        query = self.search_cache.normalize(query)
+        key = self.search_cache.key(query)
+
+        if (response := self.search_cache.get(key)) is not None:
+            return response
+
+        response = await self.search(query)
+        self.search_cache.set(key, response)
+        return response
+
     async def search(
         self,
         query: models.SearchQuery,
     ) -> models.SearchResponse:
         """Searches for a SearchQuery and returns a SearchResults"""
-
-        record_bots = self.parse_records(
-            await self.pool.fetch(
-                self.sql.search_bots.replace("{op}", query.tags.bot_op),
-                f"%{query.query}%",
-                models.BotServerState.Approved,
-                models.BotServerState.Certified,
-                query.tags.bot,
-                *query.guild_count,
-                *query.votes,
-            )
+        search_id = self.search_id(query.query)
+
+        bot_args = [
+            f"%{query.query}%",
+            models.BotServerState.Approved,
+            models.BotServerState.Certified,
+            query.tags.bot,
+            *query.guild_count,
+            *query.votes,
+            search_id,
+        ]
+        search_bots = self.search_sql(
+            self.sql.search_bots,
+            query,
+            "bots",
+            "bot_id",
+            "username_cached",
+            query.tags.bot_op,
+            query.bot_cursor,
+            bot_args,
         )
 
-        bots = await self.to_snippet(record_bots)
-
-        record_servers = self.parse_records(
-            await self.pool.fetch(
-                self.sql.search_servers.replace("{op}", query.tags.server_op),
-                f"%{query.query}%",
-                models.BotServerState.Approved,
-                models.BotServerState.Certified,
-                query.tags.server,
-                *query.guild_count,
-                *query.votes,
-            )
+        server_args = [
+            f"%{query.query}%",
+            models.BotServerState.Approved,
+            models.BotServerState.Certified,
+            query.tags.server,
+            *query.guild_count,
+            *query.votes,
+        ]
+        search_servers = self.search_sql(
+            self.sql.search_servers,
+            query,
+            "servers",
+            "guild_id",
+            "name_cached",
+            query.tags.server_op,
+            query.server_cursor,
+            server_args,
         )
 
-        servers = await self.to_snippet(record_servers)
-
-        record_profiles = self.parse_records(
-            await self.pool.fetch(
+        # A paged request (any cursor set) only continues the sections it has a cursor
+        # for. Everything else (including profiles and packs, which are not paged) was
+        # already returned with the first page
+        paged = bool(query.bot_cursor or query.server_cursor)
+
+        # Each fetch runs on its own pool connection
+        records = await asyncio.gather(
+            self.search_fetch(paged and not query.bot_cursor, search_bots, *bot_args),
+            self.search_fetch(
+                paged and not query.server_cursor, search_servers, *server_args
+            ),
+            self.search_fetch(
+                paged,
                 self.sql.search_profiles,
                 f"%{query.query}%",
                 models.BotServerState.Approved,
                 models.BotServerState.Certified,
-            )
+                search_id,
+            ),
+            self.search_fetch(
+                paged,
+                self.sql.search_packs,
+                f"%{query.query}%",
+                search_id,
+            ),
         )
+        record_bots, record_servers, record_profiles, record_packs = records
 
-        profiles = await self.to_profile_snippet(record_profiles)
+        record_bots, bot_cursor = self.search_page(record_bots, query, "bot_id")
+        record_servers, server_cursor = self.search_page(
+            record_servers, query, "guild_id"
+        )
 
-        record_packs = self.parse_records(
-            await self.pool.fetch(
-                self.sql.search_packs,
-                f"%{query.query}%",
-            )
+        # Servers do not need Discord users, so they are resolved while all the users
+        # needed by bots, profiles and packs are loaded in one deduplicated batch
+        servers, users = await asyncio.gather(
+            self.to_snippet(record_servers),
+            self.users.load_many(
+                [bot["bot_id"] for bot in record_bots]
+                + [profile["user_id"] for profile in record_profiles]
+                + [bot for pack in record_packs for bot in pack["bots"]]
+                + [pack["owner"] for pack in record_packs]
+            ),
         )
 
-        packs = await self.resolve_packs(record_packs)
+        bots, profiles, packs = await asyncio.gather(
+            self.to_snippet(record_bots, users=users),
+            self.to_profile_snippet(record_profiles, users=users),
+            self.resolve_packs(record_packs, users=users),
+        )
 
         return models.SearchResponse(
             bots=bots,
             servers=servers,
             profiles=profiles,
             packs=packs,
+            bot_cursor=bot_cursor,
+            server_cursor=server_cursor,
         )
 
     async def verify_client_id(self, client_id: int) -> Tuple[int, dict[str, Any]]:
@@ -4,22 +4,18 @@ import uuid
 
 from libcommon.tables import (
     BotCommands,
-    BotListTags,
     Bots,
     Users,
     UserBotLogs,
     Servers,
-    Features,
-    Vanity as VanityTable,
 )
 from piccolo.utils.pydantic import create_pydantic_model
 from piccolo.query import Select
-from pydantic import BaseModel, validator
+from pydantic import BaseModel, root_validator, validator
 from pydantic.generics import GenericModel
 import silverpelt.types.types as silver_types
 from libcommon.enums import *
 from libcommon import config
-from piccolo.columns.combination import WhereRaw
 
 # Add models here
 BotBase = create_pydantic_model(
@@ -686,9 +682,57 @@ class SearchQuery(BaseModel):
     tags: SearchTags = SearchTags()
     """The tags filter"""
 
+    sort: Literal["votes", "relevance"] = "votes"
+    """How to sort bots and servers: votes = by votes and then guild count, relevance = by name/description similarity to the query"""
+
+    limit: int = 6
+    """The max number of bots and servers to return (1-30)"""
+
+    bot_cursor: str | None = None
+    """Cursor of the bot page to fetch (``bot_cursor`` of the previous response). Only supported when sorting by votes"""
+
+    server_cursor: str | None = None
+    """Cursor of the server page to fetch (``server_cursor`` of the previous response). Only supported when sorting by votes"""
+
+    @validator("limit")
+    def limit_range(cls, v):
+        """Ensures that the limit is between 1 and 30"""
+        if v < 1 or v > 30:
+            raise ValueError("Limit must be between 1 and 30")
+        return v
+
+    @validator("bot_cursor", "server_cursor")
+    def cursor_format(cls, v):
+        """Ensures that a cursor is of the form votes.guild_count.id"""
+        if v is not None:
+            parts = v.split(".")
+            if len(parts) != 3 or not all(part.lstrip("-").isdigit() for part in parts):
+                raise ValueError("Invalid cursor")
+        return v
+
+    @root_validator(skip_on_failure=True)
+    def cursor_sort(cls, values):
+        """Ensures that cursors are only used when sorting by votes"""
+        if values["sort"] != "votes" and (
+            values["bot_cursor"] or values["server_cursor"]
+        ):
+            raise ValueError("Cursors are only supported when sorting by votes")
+        return values
+
+    @staticmethod
+    def make_cursor(votes: int, guild_count: int, id: int) -> str:
+        """Returns the cursor of the page after the given bot/server"""
+        return f"{votes}.{guild_count}.{id}"
+
 
 class SearchResponse(BaseModel):
-    """A search response"""
+    """
+    A search response
+
+    Only bots and servers are paged. When ``bot_cursor`` or ``server_cursor`` is set
+    on the query, only the sections with a cursor are returned (the rest, including
+    profiles and packs, are empty as they came with the first page)
+    """
 
     bots: list[Snippet]
     """The bots that matched the search query"""
@@ -697,9 +741,29 @@ class SearchResponse(BaseModel):
     """The servers that matched the search query"""
 
     profiles: list[ProfileSnippet]
-    """The profiles that matched the search query"""
+    """The profiles that matched the search query (first page only)"""
 
     packs: list[BotPack]
+    """The bot packs that matched the search query (first page only)"""
+
+    bot_cursor: str | None = None
+    """Cursor of the next page of bots (None if there are no more)"""
+
+    server_cursor: str | None = None
+    """Cursor of the next page of servers (None if there are no more)"""
+
+
+class SearchSuggestion(BaseModel):
+    """A search-as-you-type suggestion"""
+
+    kind: Literal["bot", "server", "bot_tag", "server_tag", "vanity"]
+    """What was matched"""
+
+    id: str
+    """The ID of the bot, server or tag (for vanities, the ID the vanity redirects to)"""
+
+    label: str
+    """The bot/server name, tag name or vanity code that matched"""
 
 
 class BotAddTicket(BaseModel):
@@ -803,10 +867,17 @@ class BotUpdate(BaseModel):
             raise ValueError("Vanity cannot be empty")
         return v
 
-    async def db_validate(self):
-        """Validates that all tags and features are valid and in the database"""
+    async def db_validate(
+        self, bot_tags: frozenset[str], features: frozenset[str], vanities: Any
+    ):
+        """
+        Validates that all tags and features are valid and in the database
+
+        ``bot_tags`` and ``features`` are the known IDs (see ``Mapleshade.meta``) and
+        ``vanities`` is the vanity map (see ``Mapleshade.vanity``)
+        """
         for tag in self.tags:
-            if not await BotListTags.exists().where(BotListTags.id == tag):
+            if tag not in bot_tags:
                 Response(
                     done=False,
                     code=ResponseCode.INVALID_DATA,
@@ -814,20 +885,14 @@ class BotUpdate(BaseModel):
                 ).error(400)
 
         for feature in self.features:
-            if not await Features.exists().where(Features.id == feature):
+            if feature not in features:
                 Response(
                     done=False,
                     code=ResponseCode.INVALID_DATA,
                     reason=f"Feature {feature} does not exist",
                 ).error(400)
 
-        vanity = (
-            await VanityTable.select()
-            .where(WhereRaw("lower(vanity_url) = {}", self.vanity.lower()))
-            .first()
-        )
-
-        if vanity:
+        if await vanities.resolve(self.vanity):
             Response(
                 done=False,
                 code=ResponseCode.INVALID_DATA,
@@ -851,6 +916,13 @@ class PreviewData(BaseModel):
     content: str
     """The content of the long description"""
 
+    diff: bool = False
+    """
+    Block-level diff mode. The whole document is rendered and only the top-level HTML elements
+    that changed since the last preview on this connection are sent back as
+    ``{"blocks": count, "changed": {index: html}}``
+    """
+
 
 # Constants for the bot list
 DEFAULT_EXC = {404: ResponseCode.NOT_FOUND}
@@ -10,9 +10,11 @@ from fates.decorators import Ratelimit, SharedRatelimit, route, Route, Method, n
 from libcommon import tables
 from . import tags
 from fastapi import Request, Depends
-from piccolo.columns.combination import WhereRaw
+from fastapi.responses import Response
+from pydantic import ValidationError
+import orjson
 
-from fates.mapleshade import SilverNoData
+from fates.mapleshade import SEARCH_CACHE_TTL, SilverNoData
 import silverpelt.types.types as silver_types
 from fates.app import app, mapleshade
 
@@ -43,60 +45,21 @@ async def random_snippet(
 
     nop(request)
 
-    if target_type == models.TargetType.Bot:
-        if not reroll:
-            if cached := mapleshade.cache.get("random-bot"):
-                return cached.value()
-        flag = 0
-        while flag < 10:
-            try:
-                v = (
-                    await mapleshade.to_snippet(
-                        await models.augment(
-                            tables.Bots.select(*models.BOT_SNIPPET_COLS).where(
-                                (tables.Bots.state == models.BotServerState.Approved)
-                                | (
-                                    tables.Bots.state == models.BotServerState.Certified
-                                ),
-                            ),
-                            "ORDER BY RANDOM() LIMIT 1",
-                        )
-                    )
-                )[0]
-                mapleshade.cache.set("random-bot", v, expiry=60 * 60 * 3)
-                return v
-            except Exception as exc:
-                print(exc)
-                flag += 1
-    elif target_type == models.TargetType.Server:
-        if not reroll:
-            if cached := mapleshade.cache.get("random-server"):
-                return cached.value()
-        flag = 0
-        while flag < 10:
-            try:
-                v = (
-                    await mapleshade.to_snippet(
-                        await models.augment(
-                            tables.Servers.select(*models.SERVER_SNIPPET_COLS).where(
-                                (tables.Servers.state == models.BotServerState.Approved)
-                                | (
-                                    tables.Servers.state
-                                    == models.BotServerState.Certified
-                                )
-                            ),
-                            "ORDER BY RANDOM() LIMIT 1",
-                        )
-                    )
-                )[0]
-                mapleshade.cache.set("random-server", v, expiry=60 * 60 * 3)
-                return v
-            except Exception as exc:
-                print(exc)
-                flag += 1
-    else:
+    if target_type not in (models.TargetType.Bot, models.TargetType.Server):
         models.Response.not_implemented()  # TODO: Implement this
 
+    key = f"random-{target_type.name.lower()}"
+
+    if reroll:
+        return await mapleshade.random.sample(target_type)
+
+    return await mapleshade.cache.get_or_compute(
+        key,
+        lambda: mapleshade.random.sample(target_type),
+        expiry=60 * 60 * 3,
+        stale=60 * 60,
+    )
+
 
 @route(
     Route(
@@ -114,65 +77,19 @@ async def get_index(request: Request, target_type: models.TargetType):
     Fetches the index for a bot/server.
 
     *An index is made of `Snippets`*
+
+    Indexes are rebuilt every 30 seconds and support `If-None-Match`
     """
 
-    nop(request)
+    if target_type not in (models.TargetType.Bot, models.TargetType.Server):
+        models.Response.not_implemented()  # TODO: Implement this
 
-    if target_type == models.TargetType.Bot:
-        if cached_index := mapleshade.cache.get("bot_index"):
-            return cached_index.value()
+    body, etag = await mapleshade.index.get(target_type)
 
-        index = models.Index(
-            top_voted=await mapleshade.to_snippet(
-                await tables.Bots.select(*models.BOT_SNIPPET_COLS)
-                .where(tables.Bots.state == models.BotServerState.Approved)
-                .order_by(tables.Bots.votes, ascending=False)
-                .limit(12)
-            ),
-            new=await mapleshade.to_snippet(
-                await tables.Bots.select(*models.BOT_SNIPPET_COLS)
-                .where(tables.Bots.state == models.BotServerState.Approved)
-                .order_by(tables.Bots.created_at, ascending=False)
-                .limit(12)
-            ),
-            certified=await mapleshade.to_snippet(
-                await tables.Bots.select(*models.BOT_SNIPPET_COLS)
-                .where(tables.Bots.state == models.BotServerState.Certified)
-                .order_by(tables.Bots.votes, ascending=False)
-                .limit(12)
-            ),
-        )
-        mapleshade.cache.set("bot_index", index, expiry=30)
-        return index
-    elif target_type == models.TargetType.Server:
-        if cached_index := mapleshade.cache.get("server_index"):
-            return cached_index.value()
-
-        index = models.Index(
-            top_voted=await mapleshade.to_snippet(
-                await tables.Servers.select(*models.SERVER_SNIPPET_COLS)
-                .where(tables.Servers.state == models.BotServerState.Approved)
-                .order_by(tables.Servers.votes, ascending=False)
-                .limit(12)
-            ),
-            new=await mapleshade.to_snippet(
-                await tables.Servers.select(*models.SERVER_SNIPPET_COLS)
-                .where(tables.Servers.state == models.BotServerState.Approved)
-                .order_by(tables.Servers.created_at, ascending=False)
-                .limit(12)
-            ),
-            certified=await mapleshade.to_snippet(
-                await tables.Servers.select(*models.SERVER_SNIPPET_COLS)
-                .where(tables.Servers.state == models.BotServerState.Certified)
-                .order_by(tables.Servers.votes, ascending=False)
-                .limit(12)
-            ),
-        )
-        mapleshade.cache.set("server_index", index, expiry=30)
-        return index
+    if mapleshade.index.etag_matches(etag, request.headers.get("If-None-Match", "")):
+        return Response(status_code=304, headers={"ETag": etag})
 
-    else:
-        models.Response.not_implemented()  # TODO: Implement this
+    return Response(body, media_type="application/json", headers={"ETag": etag})
 
 
 @route(
@@ -222,7 +139,7 @@ async def verify_client_id(
 
     ticket = mapleshade.gen_secret(128)
 
-    mapleshade.cache.set(
+    await mapleshade.cache.set(
         f"bot_add_ticket_{ticket}",
         {
             "bot_id": bot_id,
@@ -255,9 +172,11 @@ async def finalize_bot_add(
     if auth.auth_type != models.TargetType.User:
         models.Response.invalid_auth_type(models.TargetType.User)
 
-    await data.db_validate()
+    await data.db_validate(
+        mapleshade.meta.bot_tag_ids, mapleshade.meta.feature_ids, mapleshade.vanity
+    )
 
-    if not (ticket_data := mapleshade.cache.get(f"bot_add_ticket_{data.ticket}")):
+    if not (ticket_data := await mapleshade.cache.get(f"bot_add_ticket_{data.ticket}")):
         models.Response(
             done=False,
             code=models.ResponseCode.NOT_FOUND,
@@ -295,6 +214,8 @@ async def finalize_bot_add(
             )
         )
 
+    await mapleshade.vanity.invalidate(data.vanity)
+
     await mapleshade.silverpelt_req(
         f"channel_msg",
         method="POST",
@@ -611,6 +532,38 @@ async def test_sv_resp(request: Request):
     return req
 
 
+@route(
+    Route(
+        app=app,
+        mapleshade=mapleshade,
+        url="/@stats",
+        response_model=dict[str, Any],
+        method=Method.get,
+        tags=[tags.tests],
+        ratelimit=SharedRatelimit.new("core"),
+        auth=models.TargetType.User,
+    )
+)
+async def get_internal_stats(request: Request, auth: models.AuthData = Depends(auth)):
+    """
+    Returns internal statistics of this worker (connection pools, caches etc.) for monitoring.
+    Only usable by ``sudo`` staff
+    """
+    if auth.auth_type != models.TargetType.User:
+        models.Response.invalid_auth_type(models.TargetType.User)
+
+    nop(request)
+
+    if await mapleshade.guppy(auth.target_id) < mapleshade.perms["sudo"]:
+        models.Response(
+            done=False,
+            reason="You need to be sudo staff to view internal statistics",
+            code=models.ResponseCode.FORBIDDEN,
+        ).error(403)
+
+    return mapleshade.stats()
+
+
 @route(
     Route(
         app=app,
@@ -656,15 +609,7 @@ async def get_meta(request: Request):
 
     nop(request)
 
-    return models.ListMeta(
-        bot=models.BotListMeta(
-            tags=models.Tag.to_list(await tables.BotListTags.select()),
-            features=models.Feature.to_list(await tables.Features.select()),
-        ),
-        server=models.ServerListMeta(
-            tags=models.Tag.to_list(await tables.ServerListTags.select()),
-        ),
-    )
+    return Response(mapleshade.meta.meta_bytes, media_type="application/json")
 
 
 @route(
@@ -683,7 +628,7 @@ async def get_all_permissions(request: Request):
 
     nop(request)
 
-    return models.PermissionList(perms=mapleshade.perms)
+    return Response(mapleshade.perms_bytes, media_type="application/json")
 
 
 @route(
@@ -702,7 +647,7 @@ async def get_task(request: Request, task_id: str):
 
     nop(request)
 
-    task = mapleshade.cache.get(f"task-{task_id}")
+    task = await mapleshade.cache.get(f"task-{task_id}")
 
     if task is None:
         models.Response(
@@ -729,11 +674,112 @@ async def search(request: Request, query: models.SearchQuery):
     """
     Searches the list for a query
 
-    **This uses POST to allow for a request body**"""
+    **This uses POST to allow for a request body, use `GET /search` if you want HTTP caching**
+    """
 
     nop(request)
 
-    return await mapleshade.search(query)
+    return await mapleshade.cached_search(query)
+
+
+@route(
+    Route(
+        app=app,
+        mapleshade=mapleshade,
+        url="/search",
+        response_model=models.SearchResponse,
+        method=Method.get,
+        tags=[tags.generic],
+        ratelimit=SharedRatelimit.new("core"),
+    )
+)
+async def get_search(
+    request: Request,
+    query: str,
+    sort: str = "votes",
+    bot_tags: str = "",
+    server_tags: str = "",
+    bot_op: str = "@>",
+    server_op: str = "@>",
+    guild_count_from: int = 0,
+    guild_count_to: int = -1,
+    votes_from: int = 0,
+    votes_to: int = -1,
+    limit: int = 6,
+    bot_cursor: str = "",
+    server_cursor: str = "",
+):
+    """
+    Searches the list for a query. This is the same as `POST /search` but can be cached by browsers and CDNs
+
+    **Query Parameters**
+
+    - bot_tags/server_tags: Comma separated list of tags
+    - guild_count_to/votes_to: -1 means no upper bound
+    - bot_cursor/server_cursor: The cursors returned by the previous page (if any). Paged
+      requests only return the sections they have a cursor for
+    """
+
+    nop(request)
+
+    try:
+        search_query = models.SearchQuery(
+            query=query,
+            sort=sort,
+            limit=limit,
+            bot_cursor=bot_cursor or None,
+            server_cursor=server_cursor or None,
+            guild_count=models.SearchFilter[int](
+                filter_from=guild_count_from, filter_to=guild_count_to
+            ),
+            votes=models.SearchFilter[int](filter_from=votes_from, filter_to=votes_to),
+            tags=models.SearchTags(
+                bot=[tag for tag in bot_tags.split(",") if tag],
+                server=[tag for tag in server_tags.split(",") if tag],
+                bot_op=bot_op,
+                server_op=server_op,
+            ),
+        )
+    except ValidationError as exc:
+        models.Response(
+            done=False,
+            code=models.ResponseCode.INVALID_DATA,
+            reason=str(exc),
+        ).error(400)
+
+    res = await mapleshade.cached_search(search_query)
+
+    return Response(
+        orjson.dumps(res.dict()),
+        media_type="application/json",
+        headers={"Cache-Control": f"public, max-age={SEARCH_CACHE_TTL}"},
+    )
+
+
+@route(
+    Route(
+        app=app,
+        mapleshade=mapleshade,
+        url="/search/suggest",
+        response_model=list[models.SearchSuggestion],
+        method=Method.get,
+        tags=[tags.generic],
+        ratelimit=SharedRatelimit.new("core"),
+    )
+)
+async def search_suggest(request: Request, q: str, limit: int = 10):
+    """
+    Returns search-as-you-type suggestions (bots, servers, tags and vanity codes) for what has been typed so far
+
+    **Query Parameters**
+
+    - q: What has been typed so far (matched against the start of every word)
+    - limit: The max number of suggestions (1-25, default: 10)
+    """
+
+    nop(request)
+
+    return mapleshade.suggest.suggest(q, max(1, min(limit, 25)))
 
 
 @route(
@@ -751,11 +797,7 @@ async def resolve_vanity(request: Request, vanity: str):
     """Resolves a vanity based on the code"""
 
     nop(request)
-    vanity = (
-        await tables.Vanity.select()
-        .where(WhereRaw("lower(vanity_url) = {}", vanity.lower()))
-        .first()
-    )
+    vanity = await mapleshade.vanity.resolve(vanity)
 
     if not vanity:
         models.Response(
@@ -771,7 +813,7 @@ async def resolve_vanity(request: Request, vanity: str):
     }
 
     try:
-        vanity["type"] = vanity_map[vanity["type"]]
+        target_type = vanity_map[vanity[0]]
     except KeyError:
         models.Response(
             done=False,
@@ -780,9 +822,9 @@ async def resolve_vanity(request: Request, vanity: str):
         ).error(500)
 
     return models.Vanity(
-        target_type=vanity["type"],
-        code=vanity["vanity_url"],
-        target_id=vanity["redirect"],
+        target_type=target_type,
+        code=vanity[2],
+        target_id=vanity[1],
     )
 
 
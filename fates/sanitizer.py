@@ -0,0 +1,118 @@
+"""
+Markdown/HTML sanitization primitives
+
+These are kept out of ``mapleshade`` so that the sanitizer process pool workers (which are spawned)
+only need to import bleach and cmarkgfm and not the rest of the backend
+"""
+from html.parser import HTMLParser
+from typing import Any
+import bleach
+import cmarkgfm
+
+# Sanitizer config preloaded in each worker process by ``init_worker``
+_worker_config: dict[str, Any] = {}
+
+
+def render(
+    s: str,
+    markdown: bool,
+    *,
+    tags: list[str],
+    attrs: dict[str, list[str]],
+    cmark_opts: int,
+    cmark_exts: tuple[str, ...],
+) -> str:
+    """Renders markdown (if ``markdown`` is set) and sanitizes the resulting HTML"""
+    if markdown:
+        # First parse markdown
+        s = cmarkgfm.markdown_to_html_with_extensions(
+            s, options=cmark_opts, extensions=cmark_exts
+        )
+    return bleach.clean(
+        s,
+        tags=tags,
+        attributes=attrs,
+    )
+
+
+def init_worker(
+    tags: list[str],
+    attrs: dict[str, list[str]],
+    cmark_opts: int,
+    cmark_exts: tuple[str, ...],
+):
+    """Preloads the sanitizer config in a process pool worker"""
+    _worker_config.update(
+        tags=tags, attrs=attrs, cmark_opts=cmark_opts, cmark_exts=cmark_exts
+    )
+
+
+def render_in_worker(s: str, markdown: bool) -> str:
+    """Renders and sanitizes a string in a process pool worker using the preloaded config"""
+    return render(s, markdown, **_worker_config)
+
+
+# Elements that never have an end tag
+VOID_ELEMENTS = frozenset(
+    {
+        "area",
+        "base",
+        "br",
+        "col",
+        "embed",
+        "hr",
+        "img",
+        "input",
+        "link",
+        "meta",
+        "source",
+        "track",
+        "wbr",
+    }
+)
+
+
+class _TopLevelParser(HTMLParser):
+    """Records where each top-level element of an HTML document starts"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=False)
+        self.depth = 0
+        self.starts: list[tuple[int, int]] = []  # (line, column) as in ``getpos``
+
+    def handle_starttag(self, tag: str, attrs: list):
+        """Records top-level elements and tracks nesting"""
+        if self.depth == 0:
+            self.starts.append(self.getpos())
+
+        if tag not in VOID_ELEMENTS:
+            self.depth += 1
+
+    def handle_startendtag(self, tag: str, attrs: list):
+        """Records top-level self-closing elements"""
+        if self.depth == 0:
+            self.starts.append(self.getpos())
+
+    def handle_endtag(self, tag: str):
+        """Tracks nesting (ignoring stray end tags)"""
+        if tag not in VOID_ELEMENTS:
+            self.depth = max(self.depth - 1, 0)
+
+
+def split_html(html: str) -> list[str]:
+    """
+    Splits rendered HTML into its top-level elements. Text and comments between
+    elements stay with the element before them
+    """
+    parser = _TopLevelParser()
+    parser.feed(html)
+    parser.close()
+
+    # Convert (line, column) positions to offsets
+    line_offsets = [0]
+    for line in html.splitlines(keepends=True):
+        line_offsets.append(line_offsets[-1] + len(line))
+
+    cuts = [line_offsets[line - 1] + column for line, column in parser.starts[1:]]
+
+    return [html[start:end] for start, end in zip([0] + cuts, cuts + [len(html)])]
@@ -6,22 +6,23 @@ AND (bots.FIELD >= $N) -- FROM
 AND (($N+1 = -1) OR (bots.FIELD <= $N+1)) -- TO
 */
 
-SELECT DISTINCT bots.bot_id, bots.created_at, bots.description, bots.banner_card, bots.state, 
+SELECT bots.bot_id, bots.created_at, bots.description, bots.banner_card, bots.state, 
 bots.votes, bots.flags, bots.guild_count FROM bots 
-INNER JOIN bot_owner ON bots.bot_id = bot_owner.bot_id 
-WHERE (bots.description ilike $1 
+WHERE (bots.description ilike $1 -- The ilike predicates use the pg_trgm indexes
 OR bots.long_description ilike $1 
 OR bots.username_cached ilike $1 
-OR bot_owner.owner::text ilike $1) 
+-- Owned bots are looked up once (not per bot with EXISTS) so that postgres can still combine the indexes
+OR bots.bot_id = ANY(ARRAY(SELECT bot_owner.bot_id FROM bot_owner WHERE bot_owner.owner = $9))) -- $9 is -1 if the query is not an ID
 AND (bots.state = $2 OR bots.state = $3) 
 AND (cardinality($4::text[]) = 0 OR bots.tags {op} $4) -- Tags (either empty or do all tags in $4 exist in bots.tags)
 
--- Guild Count filter
-AND (bots.guild_count >= $5)
-AND (($6 = -1::bigint) OR (bots.guild_count <= $6))
+-- Guild Count filter (NULL counts are 0 here and in the order/cursor)
+AND (coalesce(bots.guild_count, 0) >= $5)
+AND (($6 = -1::bigint) OR (coalesce(bots.guild_count, 0) <= $6))
 
 -- Votes filter
-AND (bots.votes >= $7)
-AND (($8 = -1::bigint) OR (bots.votes <= $8))
+AND (coalesce(bots.votes, 0) >= $7)
+AND (($8 = -1::bigint) OR (coalesce(bots.votes, 0) <= $8))
 
-ORDER BY bots.votes DESC, bots.guild_count DESC LIMIT 6
\ No newline at end of file
+{cursor} -- Keyset cursor (if any)
+ORDER BY {order} LIMIT {limit}
\ No newline at end of file
@@ -1,12 +1,10 @@
-SELECT DISTINCT bot_packs.id, bot_packs.icon, bot_packs.banner, 
+SELECT bot_packs.id, bot_packs.icon, bot_packs.banner, 
 bot_packs.created_at, bot_packs.owner, bot_packs.bots, 
-bot_packs.description, bot_packs.name FROM (
-    SELECT id, icon, banner, 
-    created_at, owner, bots, 
-    description, name, unnest(bots) AS bot_id FROM bot_packs
-) bot_packs
-INNER JOIN bots ON bots.bot_id = bot_packs.bot_id 
-INNER JOIN users ON users.user_id = bot_packs.owner
-WHERE bot_packs.name ilike $1 OR bot_packs.owner::text 
-ilike $1 OR users.username ilike $1 OR bots.bot_id::text ilike $1 
-OR bots.username_cached ilike $1
\ No newline at end of file
+bot_packs.description, bot_packs.name FROM bot_packs 
+WHERE bot_packs.name ilike $1 
+OR bot_packs.owner = $2 -- $2 is -1 if the query is not an ID
+OR bot_packs.bots @> ARRAY[$2]::bigint[] 
+-- Matching owners and bots are looked up once (not per pack with EXISTS) so that postgres can combine the indexes
+OR bot_packs.owner = ANY(ARRAY(SELECT users.user_id FROM users WHERE users.username ilike $1)) 
+OR bot_packs.bots && ARRAY(SELECT bots.bot_id FROM bots WHERE bots.username_cached ilike $1) 
+ORDER BY bot_packs.created_at DESC LIMIT 6
\ No newline at end of file
@@ -0,0 +1,3 @@
+SELECT vanity.redirect, vanity.vanity_url FROM vanity 
+WHERE (vanity.type = 1 AND EXISTS (SELECT 1 FROM bots WHERE bots.bot_id = vanity.redirect AND bots.state = ANY($1))) -- $1 is the listed (approved/certified) states
+OR (vanity.type = 0 AND EXISTS (SELECT 1 FROM servers WHERE servers.guild_id = vanity.redirect AND servers.state = ANY($1)))
\ No newline at end of file
@@ -1,27 +1,33 @@
 from typing import Awaitable
 from libcommon import tables
+from libcommon.enums import TargetType
 from fates.app import mapleshade
 from fastapi.encoders import jsonable_encoder
 import traceback
 
+# How long task statuses and results (including data requests) are kept (seconds)
+TASK_RESULT_TTL = 60 * 60
+
 
 async def task(task: Awaitable, task_id: str):
     """Creates a task"""
 
     print(f"Starting task {task_id}")
 
-    mapleshade.cache.set(f"task-{task_id}", "running")
+    await mapleshade.cache.set(f"task-{task_id}", "running", expiry=TASK_RESULT_TTL)
 
     try:
         ret = await task
     except Exception as exc:
-        mapleshade.cache.set(f"task-{task_id}", traceback.format_exc(exc))
+        await mapleshade.cache.set(
+            f"task-{task_id}", traceback.format_exc(exc), expiry=TASK_RESULT_TTL
+        )
         raise exc
 
     if not ret:
         ret = "OK"
 
-    mapleshade.cache.set(f"task-{task_id}", ret)
+    await mapleshade.cache.set(f"task-{task_id}", ret, expiry=TASK_RESULT_TTL)
 
 
 async def data_request(user_id: int):
@@ -65,6 +71,7 @@ async def data_delete(user_id: int):
     # TODO: Handle bot/server votes checks of lynx
     # TODO: Also handle global ban and other ban cases
     await tables.Users.delete().where(tables.Users.user_id == user_id)
+    await mapleshade.auth_cache.invalidate(TargetType.User, user_id)
 
     # Delete all bot data of a user
     bots = await mapleshade.pool.fetch(
@@ -73,23 +80,29 @@ async def data_delete(user_id: int):
     )
     for bot in bots:
         await tables.Bots.delete().where(tables.Bots.bot_id == bot["bot_id"])
-        await tables.Vanity.delete().where(tables.Vanity.redirect == bot["bot_id"])
+        vanities = await mapleshade.pool.fetch(
+            "DELETE FROM vanity WHERE redirect = $1 RETURNING vanity_url",
+            bot["bot_id"],
+        )
+        for vanity in vanities:
+            await mapleshade.vanity.invalidate(vanity["vanity_url"])
+        await mapleshade.auth_cache.invalidate(TargetType.Bot, bot["bot_id"])
 
     # Delete all vote data of a user
-    votes = await tables.BotVoters.select(tables.BotVoters.bot_id).where(
+    bot_votes = await tables.BotVoters.select(tables.BotVoters.bot_id).where(
         tables.BotVoters.user_id == user_id
     )
-    for vote in votes:
+    for vote in bot_votes:
         await tables.Bots.update(votes=tables.Bots.votes - 1).where(
             tables.Bots.bot_id == vote["bot_id"]
         )
 
     await tables.BotVoters.delete().where(tables.BotVoters.user_id == user_id)
 
-    votes = await tables.ServerVoters.select(tables.ServerVoters.guild_id).where(
+    server_votes = await tables.ServerVoters.select(tables.ServerVoters.guild_id).where(
         tables.ServerVoters.user_id == user_id
     )
-    for vote in votes:
+    for vote in server_votes:
         await tables.Servers.update(votes=tables.Servers.votes - 1).where(
             tables.Servers.guild_id == vote["guild_id"]
         )
@@ -2,46 +2,108 @@ import asyncio
 import time
 from fastapi import WebSocket
 import orjson
-from fates import models
+from fates import models, sanitizer
 from fates.app import app, mapleshade
+from fates.connections import ConnectionManager
 
+# Seconds of no new input before a preview is rendered (only the latest message is rendered)
+PREVIEW_DEBOUNCE = 0.15
 
-class ConnectionManager:
+# Max seconds a preview can be delayed by continuous input
+PREVIEW_MAX_DELAY = 1
+
+manager = ConnectionManager()
+mapleshade.extra_stats["preview_ws"] = manager.stats
+
+
+class PreviewSession:
     """
-    Represents a connection manager which handles connections of a client and disconnecting unresponsive clients
+    Per-connection live preview state
+
+    Messages are coalesced so only the latest one is rendered once the input has settled
+    (or ``PREVIEW_MAX_DELAY`` has passed). In diff mode, the top-level elements of the last
+    render are kept so only changed elements are sent back
     """
 
-    def __init__(self):
-        self.ws: list[WebSocket] = []
+    def __init__(self, ws: WebSocket):
+        self.ws = ws
+        self.pending: str | None = None
+        self.ready = asyncio.Event()
+        self.blocks: list[str] = []  # Top-level elements of the last render (diff mode)
+
+    def push(self, data: str):
+        """Queues a message for rendering, replacing any message that has not been rendered yet"""
+        self.pending = data
+        self.ready.set()
 
-        asyncio.create_task(self._check_ping())
+    async def run(self):
+        """Renders the latest pending message whenever input settles"""
+        loop = asyncio.get_running_loop()
 
-    async def _check_ping(self):
-        """Checks the ping of all websockets, and disconnects them if they are unresponsive"""
         while True:
-            for ws in self.ws:
+            await self.ready.wait()
+
+            # Debounce, waiting for more input but never longer than PREVIEW_MAX_DELAY
+            started = loop.time()
+            while loop.time() - started < PREVIEW_MAX_DELAY:
+                self.ready.clear()
                 try:
-                    if time.time() - ws.state.last_ping > 45:
-                        await self.disconnect(ws, "Ping timeout")
-                except:
-                    pass
-            await asyncio.sleep(5)
-
-    async def connect(self, ws: WebSocket):
-        """Connects a websocket and adds it to the connection manager list thus adding it to PING checks"""
-        await ws.accept()
-        self.ws.append(ws)
-
-    async def disconnect(self, ws: WebSocket, reason: str = "Unknown"):
-        """Disconnects a websocket and removes it from the connection manager list thus removing it from PING checks"""
+                    await asyncio.wait_for(self.ready.wait(), PREVIEW_DEBOUNCE)
+                except asyncio.TimeoutError:
+                    break
+
+            self.ready.clear()
+            data, self.pending = self.pending, None
+
+            if data is None:
+                continue
+
+            try:
+                if not await self.render(data):
+                    return
+            except Exception as exc:
+                # Most likely the socket was closed while rendering
+                print(exc)
+                return
+
+    async def render(self, data: str) -> bool:
+        """Renders and sends a preview message, returns False if the connection was closed"""
         try:
-            self.ws.remove(ws)
-            await ws.close(4000, reason)
+            data = orjson.loads(data)
         except:
-            pass
-
+            await manager.disconnect(self.ws, "Invalid JSON")
+            return False
 
-manager = ConnectionManager()
+        try:
+            data = models.PreviewData(**data)
+        except Exception as exc:
+            print(exc)
+            await manager.disconnect(self.ws, f"Invalid data in JSON")
+            return False
+
+        if data.diff:
+            # Render the whole document (references, loose lists and HTML blocks can span
+            # blank lines) and diff the top-level elements of the output
+            blocks = sanitizer.split_html(
+                await mapleshade.sanitize_async(data.content, data.type)
+            )
+
+            ret = {
+                "blocks": len(blocks),
+                "changed": {
+                    str(i): block
+                    for i, block in enumerate(blocks)
+                    if i >= len(self.blocks) or self.blocks[i] != block
+                },
+            }
+
+            self.blocks = blocks
+        else:
+            ret = {"text": await mapleshade.sanitize_async(data.content, data.type)}
+            self.blocks = []
+
+        await self.ws.send_text(orjson.dumps(ret).decode())
+        return True
 
 
 @app.websocket("/ws/preview")
@@ -50,31 +112,22 @@ async def preview(ws: WebSocket):
 
     await manager.connect(ws)
 
+    session = PreviewSession(ws)
+    renderer = asyncio.create_task(session.run())
+
     try:
         while True:
             data = await ws.receive_text()
             if data == "PING":
-                ws.state.last_ping = time.time()
+                manager.ping(ws)
                 await ws.send_text(f"PONG:{time.time()}")
             else:
-                try:
-                    data = orjson.loads(data)
-                except:
-                    await manager.disconnect(ws, "Invalid JSON")
-
-                try:
-                    data = models.PreviewData(**data)
-                except Exception as exc:
-                    print(exc)
-                    await manager.disconnect(ws, f"Invalid data in JSON")
-                    return
-
-                ret = {"text": mapleshade.sanitize(data.content, data.type)}
-
-                await ws.send_text(orjson.dumps(ret).decode())
+                session.push(data)
     except Exception as exc:
         try:
             print(exc)
             await manager.disconnect(ws, "Unknown error")
         except:
             pass
+    finally:
+        renderer.cancel()
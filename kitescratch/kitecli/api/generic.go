@@ -1,10 +1,13 @@
 package api
 
 import (
+	"fmt"
 	"kitecli/auth"
 	"kitecli/requests"
 	"kitecli/types"
+	"net/url"
 	"strconv"
+	"strings"
 )
 
 func CheckAuthHeader(a *auth.Auth) types.AuthCheck {
@@ -139,3 +142,45 @@ func Search(data SearchData) types.SearchResponse {
 
 	return resp
 }
+
+// Same as Search but uses GET /search which can be cached
+func GetSearch(data SearchData) types.SearchResponse {
+	params := url.Values{}
+	params.Set("query", data.Query)
+	params.Set("guild_count_from", fmt.Sprint(data.GuildCount.From))
+	params.Set("guild_count_to", fmt.Sprint(data.GuildCount.To))
+	params.Set("votes_from", fmt.Sprint(data.Votes.From))
+	params.Set("votes_to", fmt.Sprint(data.Votes.To))
+	params.Set("bot_tags", strings.Join(data.BotTags, ","))
+	params.Set("server_tags", strings.Join(data.ServerTags, ","))
+
+	if data.BotTagOp != "" {
+		params.Set("bot_op", data.BotTagOp)
+	}
+
+	if data.ServerTagOp != "" {
+		params.Set("server_op", data.ServerTagOp)
+	}
+
+	var resp types.SearchResponse
+
+	requests.RequestToStruct(requests.HTTPRequest{
+		Method: "GET",
+		Url:    "/search?" + params.Encode(),
+		Reason: Reason,
+	}, &resp)
+
+	return resp
+}
+
+func SearchSuggest(q string, limit int) []types.SearchSuggestion {
+	var suggestions []types.SearchSuggestion
+
+	requests.RequestToStruct(requests.HTTPRequest{
+		Method: "GET",
+		Url:    "/search/suggest?q=" + url.QueryEscape(q) + "&limit=" + strconv.Itoa(limit),
+		Reason: Reason,
+	}, &suggestions)
+
+	return suggestions
+}
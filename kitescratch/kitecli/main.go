@@ -153,6 +153,14 @@ func mainMenu() {
 					return nil
 				},
 			},
+			{
+				Text: "Search Suggestions",
+				Char: "SS",
+				Handler: func() error {
+					searchSuggestView()
+					return nil
+				},
+			},
 			{
 				Text: "Fetch a bot",
 				Char: "FB",
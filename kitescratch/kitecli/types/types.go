@@ -339,6 +339,16 @@ type SearchResponse struct {
 	Servers  []Snippet        `json:"servers"`
 	Profiles []ProfileSnippet `json:"profiles"`
 	Packs    []BotPack        `json:"packs"`
+
+	// Cursors of the next page (empty if there are no more)
+	BotCursor    string `json:"bot_cursor"`
+	ServerCursor string `json:"server_cursor"`
+}
+
+type SearchSuggestion struct {
+	Kind  string `json:"kind"`
+	ID    string `json:"id"`
+	Label string `json:"label"`
 }
 
 type SearchFilter struct {
@@ -452,16 +452,26 @@ func searchView() {
 		serverOp = "&&"
 	}
 
+	useGet := ui.AskInput("Use the cacheable GET /search instead of POST /search? (y/n)")
+
 	api.SetReason("Searching for query")
 
-	res := api.Search(api.SearchData{
+	searchData := api.SearchData{
 		Query:      query,
 		GuildCount: gcFilter,
 		Votes:      voteFilter,
 		BotTags:    tags,
 		ServerTags: serverTagList,
 		BotTagOp:   botOp,
-	})
+	}
+
+	var res types.SearchResponse
+
+	if useGet == "y" {
+		res = api.GetSearch(searchData)
+	} else {
+		res = api.Search(searchData)
+	}
 
 	var outputStr string
 
@@ -492,6 +502,23 @@ func searchView() {
 	ui.PageOutput(outputStr)
 }
 
+func searchSuggestView() {
+	q := ui.AskInput("Enter the start of a bot/server name, tag or vanity code")
+
+	api.SetReason("Fetching search suggestions")
+
+	suggestions := api.SearchSuggest(q, 10)
+
+	if len(suggestions) == 0 {
+		ui.RedText("No suggestions found")
+		return
+	}
+
+	for _, suggestion := range suggestions {
+		ui.NormalText(suggestion.Label, "("+suggestion.Kind+" "+suggestion.ID+")")
+	}
+}
+
 func addBotView() {
 	clientId := ui.AskInput("Enter the client ID of the bot you wish to add to the list")
 
@@ -1,13 +1,14 @@
 package config
 
 type Config struct {
-	Secrets  Secrets  `yaml:"secrets"`
-	Storage  Storage  `yaml:"storage"`
-	Servers  Servers  `yaml:"servers"`
-	Deploy   Deploy   `yaml:"deploy"`
-	Perms    PermList `yaml:"perms"`
-	Channels Channels `yaml:"channels"`
-	Misc     Misc     `yaml:"misc"`
+	Secrets    Secrets    `yaml:"secrets"`
+	Storage    Storage    `yaml:"storage"`
+	Servers    Servers    `yaml:"servers"`
+	Deploy     Deploy     `yaml:"deploy"`
+	Perms      PermList   `yaml:"perms"`
+	Channels   Channels   `yaml:"channels"`
+	Misc       Misc       `yaml:"misc"`
+	Silverpelt Silverpelt `yaml:"silverpelt"`
 }
 
 type Secrets struct {
@@ -69,6 +70,12 @@ type Channels struct {
 	BotLogs uint64 `yaml:"bot_logs"`
 }
 
+type Silverpelt struct {
+	UserCacheTTL uint32 `yaml:"user_cache_ttl" default:"28800" comment:"How long fetched users are cached (seconds)" required:"false"`
+	NegativeTTL  uint32 `yaml:"negative_ttl" default:"60" comment:"How long users Discord could not find are cached (seconds), 0 to not cache them" required:"false"`
+	RefreshAhead uint32 `yaml:"refresh_ahead" default:"3600" comment:"Users requested this close to their cache expiring (seconds) are refetched in the background, 0 to disable" required:"false"`
+}
+
 type Misc struct {
 	RestrictedVanity []string `yaml:"restricted_vanity" default:"api,docs,add-bot,admin"`
 }
@@ -46,6 +46,11 @@ func GenConfigSample(progname string, args []string) {
 		Misc: Misc{
 			RestrictedVanity: []string{"api", "docs", "add-bot", "admin"},
 		},
+		Silverpelt: Silverpelt{
+			UserCacheTTL: 8 * 60 * 60,
+			NegativeTTL:  60,
+			RefreshAhead: 60 * 60,
+		},
 		Perms: PermList{
 			Sudo: Perm{
 				Index: 10,
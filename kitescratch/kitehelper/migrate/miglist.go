@@ -492,4 +492,309 @@ var migs = []migration{
 			}
 		},
 	},
+	{
+		name: "Trigram indexes for search",
+		function: func() {
+			_, err := pgpool.Exec(ctx, "CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+			if err != nil {
+				panic(err)
+			}
+
+			created := createIndexes([][2]string{
+				{"bots_description_trgm_idx", "bots USING GIN (description gin_trgm_ops)"},
+				{"bots_long_description_trgm_idx", "bots USING GIN (long_description gin_trgm_ops)"},
+				{"bots_username_cached_trgm_idx", "bots USING GIN (username_cached gin_trgm_ops)"},
+				{"servers_description_trgm_idx", "servers USING GIN (description gin_trgm_ops)"},
+				{"servers_long_description_trgm_idx", "servers USING GIN (long_description gin_trgm_ops)"},
+				{"servers_name_cached_trgm_idx", "servers USING GIN (name_cached gin_trgm_ops)"},
+				{"users_username_trgm_idx", "users USING GIN (username gin_trgm_ops)"},
+				{"bot_packs_name_trgm_idx", "bot_packs USING GIN (name gin_trgm_ops)"},
+				{"bot_owner_owner_idx", "bot_owner (owner)"},
+			})
+
+			if !created {
+				alrMigrated()
+			}
+		},
+	},
+	{
+		name: "Keyset pagination indexes for search",
+		function: func() {
+			// Search orders and pages by coalesce(votes, 0) and coalesce(guild_count, 0) as both are nullable
+			created := createIndexes([][2]string{
+				{"bots_keyset_idx", "bots ((coalesce(votes, 0)) DESC, (coalesce(guild_count, 0)) DESC, bot_id DESC)"},
+				{"servers_keyset_idx", "servers ((coalesce(votes, 0)) DESC, (coalesce(guild_count, 0)) DESC, guild_id DESC)"},
+			})
+
+			// The first version of this migration indexed the plain columns, which the search can not use
+			for _, index := range []string{"bots_votes_guild_count_idx", "servers_votes_guild_count_idx"} {
+				if !indexExists(index) {
+					continue
+				}
+
+				_, err := pgpool.Exec(ctx, "DROP INDEX "+index)
+
+				if err != nil {
+					panic(err)
+				}
+
+				created = true
+			}
+
+			if !created {
+				alrMigrated()
+			}
+		},
+	},
+	{
+		name: "Bot pack members index for search",
+		function: func() {
+			created := createIndexes([][2]string{
+				{"bot_packs_bots_idx", "bot_packs USING GIN (bots)"},
+				{"bot_packs_owner_idx", "bot_packs (owner)"},
+			})
+
+			if !created {
+				alrMigrated()
+			}
+		},
+	},
+	{
+		name: "Unique lower(vanity_url) index",
+		function: func() {
+			if indexExists("vanity_lower_vanity_url_idx") {
+				alrMigrated()
+				return
+			}
+
+			rows, err := pgpool.Query(ctx, "SELECT lower(vanity_url) FROM vanity GROUP BY lower(vanity_url) HAVING count(*) > 1")
+
+			if err != nil {
+				panic(err)
+			}
+
+			var duplicates []string
+
+			for rows.Next() {
+				var vanity string
+
+				err = rows.Scan(&vanity)
+
+				if err != nil {
+					panic(err)
+				}
+
+				duplicates = append(duplicates, vanity)
+			}
+
+			rows.Close()
+
+			if len(duplicates) > 0 {
+				statusBoldErr("Vanities that differ only in case must be fixed first:", strings.Join(duplicates, ", "))
+				panic("duplicate vanities")
+			}
+
+			statusBoldYellow("Creating index", "vanity_lower_vanity_url_idx")
+
+			_, err = pgpool.Exec(ctx, "CREATE UNIQUE INDEX vanity_lower_vanity_url_idx ON vanity (lower(vanity_url))")
+
+			if err != nil {
+				panic(err)
+			}
+		},
+	},
+	{
+		name: "Hashed bot API token lookup",
+		function: func() {
+			if colExists("bots", "api_token_digest") && indexExists("bots_api_token_digest_idx") {
+				alrMigrated()
+				return
+			}
+
+			_, err := pgpool.Exec(ctx, "ALTER TABLE bots ADD COLUMN IF NOT EXISTS api_token_digest BYTEA")
+
+			if err != nil {
+				panic(err)
+			}
+
+			// Keep the digest in sync with the token, whoever writes it
+			_, err = pgpool.Exec(ctx, `CREATE OR REPLACE FUNCTION bots_api_token_digest() RETURNS trigger AS $$
+BEGIN
+	NEW.api_token_digest := sha256(convert_to(NEW.api_token, 'UTF8'));
+	RETURN NEW;
+END;
+$$ LANGUAGE plpgsql`)
+
+			if err != nil {
+				panic(err)
+			}
+
+			_, err = pgpool.Exec(ctx, "DROP TRIGGER IF EXISTS bots_api_token_digest ON bots")
+
+			if err != nil {
+				panic(err)
+			}
+
+			_, err = pgpool.Exec(ctx, "CREATE TRIGGER bots_api_token_digest BEFORE INSERT OR UPDATE OF api_token ON bots FOR EACH ROW EXECUTE FUNCTION bots_api_token_digest()")
+
+			if err != nil {
+				panic(err)
+			}
+
+			statusBoldYellow("Hashing bot API tokens")
+
+			_, err = pgpool.Exec(ctx, "UPDATE bots SET api_token_digest = sha256(convert_to(api_token, 'UTF8')) WHERE api_token_digest IS NULL")
+
+			if err != nil {
+				panic(err)
+			}
+
+			createIndexes([][2]string{
+				{"bots_api_token_digest_idx", "bots (api_token_digest)"},
+			})
+		},
+	},
+	{
+		name: "Bump bots.last_updated_at on state and name changes",
+		function: func() {
+			// The API syncs listed bots (random, search suggestions) using last_updated_at,
+			// so it must change whenever a bot is approved, denied, banned, certified or renamed
+			_, err := pgpool.Exec(ctx, `CREATE OR REPLACE FUNCTION bots_touch_last_updated_at() RETURNS trigger AS $$
+BEGIN
+	NEW.last_updated_at := now();
+	RETURN NEW;
+END;
+$$ LANGUAGE plpgsql`)
+
+			if err != nil {
+				panic(err)
+			}
+
+			_, err = pgpool.Exec(ctx, "DROP TRIGGER IF EXISTS bots_touch_last_updated_at ON bots")
+
+			if err != nil {
+				panic(err)
+			}
+
+			_, err = pgpool.Exec(ctx, `CREATE TRIGGER bots_touch_last_updated_at BEFORE UPDATE OF state, username_cached ON bots FOR EACH ROW
+WHEN (OLD.state IS DISTINCT FROM NEW.state OR OLD.username_cached IS DISTINCT FROM NEW.username_cached)
+EXECUTE FUNCTION bots_touch_last_updated_at()`)
+
+			if err != nil {
+				panic(err)
+			}
+
+			created := createIndexes([][2]string{
+				{"bots_last_updated_at_idx", "bots (last_updated_at)"},
+			})
+
+			if !created {
+				statusGood("Trigger updated")
+			}
+		},
+	},
+	{
+		name: "Notify the API of bot and server listing changes",
+		function: func() {
+			// The API keeps listed bots and servers in memory (random and search suggestions) and caches
+			// search results, all updated from these notifications, so approving, denying, banning,
+			// certifying, voting for, renaming or deleting a bot or server outside the API still shows up
+			// right away. The payload is "{target type}:{id}"
+			_, err := pgpool.Exec(ctx, `CREATE OR REPLACE FUNCTION notify_listing_change() RETURNS trigger AS $$
+BEGIN
+	PERFORM pg_notify('listing_changes', TG_ARGV[0] || ':' || (to_jsonb(CASE WHEN TG_OP = 'DELETE' THEN OLD ELSE NEW END) ->> TG_ARGV[1]));
+	RETURN NULL;
+END;
+$$ LANGUAGE plpgsql`)
+
+			if err != nil {
+				panic(err)
+			}
+
+			// Target type (0 = bot, 1 = server), ID column and name column of each table
+			for _, target := range [][4]string{{"bots", "0", "bot_id", "username_cached"}, {"servers", "1", "guild_id", "name_cached"}} {
+				table, args := target[0], "'"+target[1]+"', '"+target[2]+"'"
+
+				// Columns whose changes are sent
+				cols := []string{"state", "votes", target[3]}
+
+				var changed []string
+
+				for _, col := range cols {
+					changed = append(changed, "OLD."+col+" IS DISTINCT FROM NEW."+col)
+				}
+
+				for _, stmt := range []string{
+					"DROP TRIGGER IF EXISTS " + table + "_notify_listing_update ON " + table,
+					"DROP TRIGGER IF EXISTS " + table + "_notify_listing_delete ON " + table,
+					"CREATE TRIGGER " + table + "_notify_listing_update AFTER UPDATE OF " + strings.Join(cols, ", ") + " ON " + table +
+						" FOR EACH ROW WHEN (" + strings.Join(changed, " OR ") + ") EXECUTE FUNCTION notify_listing_change(" + args + ")",
+					"CREATE TRIGGER " + table + "_notify_listing_delete AFTER DELETE ON " + table + " FOR EACH ROW " +
+						"EXECUTE FUNCTION notify_listing_change(" + args + ")",
+				} {
+					_, err = pgpool.Exec(ctx, stmt)
+
+					if err != nil {
+						panic(err)
+					}
+				}
+			}
+
+			statusGood("Triggers updated")
+		},
+	},
+	{
+		name: "Notify the API of token and user state changes",
+		function: func() {
+			// The API caches API tokens and whether users are globally banned, dropping them from these
+			// notifications so regenerating a token or banning a user outside the API takes effect right
+			// away. The payload is "{target type}:{id}"
+			_, err := pgpool.Exec(ctx, `CREATE OR REPLACE FUNCTION notify_auth_change() RETURNS trigger AS $$
+BEGIN
+	PERFORM pg_notify('auth_changes', TG_ARGV[0] || ':' || (to_jsonb(CASE WHEN TG_OP = 'DELETE' THEN OLD ELSE NEW END) ->> TG_ARGV[1]));
+	RETURN NULL;
+END;
+$$ LANGUAGE plpgsql`)
+
+			if err != nil {
+				panic(err)
+			}
+
+			// Target type (0 = bot, 1 = server, 2 = user), ID column and the columns whose changes are sent
+			for _, target := range []struct {
+				table, targetType, id string
+				cols                  []string
+			}{
+				{"users", "2", "user_id", []string{"api_token", "state"}},
+				{"bots", "0", "bot_id", []string{"api_token"}},
+				{"servers", "1", "guild_id", []string{"api_token"}},
+			} {
+				table, args := target.table, "'"+target.targetType+"', '"+target.id+"'"
+
+				var changed []string
+
+				for _, col := range target.cols {
+					changed = append(changed, "OLD."+col+" IS DISTINCT FROM NEW."+col)
+				}
+
+				for _, stmt := range []string{
+					"DROP TRIGGER IF EXISTS " + table + "_notify_auth_update ON " + table,
+					"DROP TRIGGER IF EXISTS " + table + "_notify_auth_delete ON " + table,
+					"CREATE TRIGGER " + table + "_notify_auth_update AFTER UPDATE OF " + strings.Join(target.cols, ", ") + " ON " + table +
+						" FOR EACH ROW WHEN (" + strings.Join(changed, " OR ") + ") EXECUTE FUNCTION notify_auth_change(" + args + ")",
+					"CREATE TRIGGER " + table + "_notify_auth_delete AFTER DELETE ON " + table + " FOR EACH ROW " +
+						"EXECUTE FUNCTION notify_auth_change(" + args + ")",
+				} {
+					_, err = pgpool.Exec(ctx, stmt)
+
+					if err != nil {
+						panic(err)
+					}
+				}
+			}
+
+			statusGood("Triggers updated")
+		},
+	},
 }
@@ -45,6 +45,40 @@ func colExists(table, col string) bool {
 	return exists
 }
 
+func indexExists(name string) bool {
+	var exists bool
+	err := pgpool.QueryRow(ctx, "SELECT EXISTS (SELECT 1 FROM pg_indexes WHERE indexname = $1)", name).Scan(&exists)
+
+	if err != nil {
+		panic(err)
+	}
+
+	return exists
+}
+
+// Creates the given indexes (name, definition) that do not exist yet, returning whether any were created
+func createIndexes(indexes [][2]string) bool {
+	var created bool
+
+	for _, index := range indexes {
+		if indexExists(index[0]) {
+			continue
+		}
+
+		statusBoldYellow("Creating index", index[0])
+
+		_, err := pgpool.Exec(ctx, "CREATE INDEX "+index[0]+" ON "+index[1])
+
+		if err != nil {
+			panic(err)
+		}
+
+		created = true
+	}
+
+	return created
+}
+
 func alrMigrated() {
 	statusGood("Already migrated, nothing to do here...")
 }
@@ -0,0 +1,42 @@
+# Checks that overwriting a shared cache key keeps the new value in the in-process tier
+# (L1) and that L1 returns the same (msgpack) types as redis would
+import sys
+sys.path.append(".")
+
+import asyncio
+
+
+async def _check():
+    import aioredis
+    from fates import models
+    from fates.mapleshade import TieredCache
+
+    # Nothing listens on port 1, so this only exercises L1
+    cache = TieredCache(aioredis.from_url("redis://127.0.0.1:1"))
+
+    await cache.set("kitehelper-test", "running", expiry=60)
+    await cache.set("kitehelper-test", {"done": True}, expiry=60)
+
+    # Give expiry timers of the overwritten value a chance to run
+    await asyncio.sleep(0.1)
+
+    if not (cached := cache.l1.get("kitehelper-test")):
+        print("Overwritten cache key was dropped from L1")
+        exit(1)
+
+    if cached.value() != {"done": True}:
+        print(f"Overwritten cache key has the wrong value in L1: {cached.value()}")
+        exit(1)
+
+    await cache.set(
+        "kitehelper-test",
+        models.Tag(id="test", iconify_data="fa:test", name="Test"),
+        expiry=60,
+    )
+
+    if not isinstance(cache.l1.get("kitehelper-test").value(), dict):
+        print("L1 does not store the same msgpack types as redis")
+        exit(1)
+
+
+asyncio.run(_check())
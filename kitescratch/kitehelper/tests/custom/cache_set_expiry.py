@@ -0,0 +1,29 @@
+# Checks that every write to the shared cache (mapleshade.cache.set) has an expiry, so
+# that nothing (like data request results) stays in redis forever
+import ast
+import os
+
+for py_file in os.listdir("fates"):
+    if not py_file.endswith(".py"):
+        continue
+
+    with open(f"fates/{py_file}") as file:
+        tree = ast.parse(file.read())
+
+    for node in ast.walk(tree):
+        if not isinstance(node, ast.Call) or not isinstance(node.func, ast.Attribute):
+            continue
+
+        # Matches mapleshade.cache.set(...) and self.cache.set(...)
+        target = node.func.value
+
+        if node.func.attr != "set" or not (
+            isinstance(target, ast.Attribute) and target.attr == "cache"
+        ):
+            continue
+
+        expiry = next((kw.value for kw in node.keywords if kw.arg == "expiry"), None)
+
+        if expiry is None or (isinstance(expiry, ast.Constant) and not expiry.value):
+            print(f"fates/{py_file}:{node.lineno} sets a shared cache key without an expiry")
+            exit(1)
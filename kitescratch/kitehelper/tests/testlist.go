@@ -40,6 +40,16 @@ var testList = testset{
 			cmd:        []string{"python3"},
 			customTest: "docstring_ensure.py",
 		},
+		{
+			name:       "cache_set_expiry.py",
+			cmd:        []string{"python3"},
+			customTest: "cache_set_expiry.py",
+		},
+		{
+			name:       "cache_l1_overwrite.py",
+			cmd:        []string{"python3"},
+			customTest: "cache_l1_overwrite.py",
+		},
 		{
 			name: "sunbeam (format)",
 			cmd:  []string{"npm", "run", "format"},
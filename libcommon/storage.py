@@ -0,0 +1,41 @@
+import os
+
+import aioredis
+import msgpack
+
+from .config import config
+
+# Pub/sub channel used by fates workers to tell each other about cache writes
+CACHE_INVALIDATE_CHANNEL = "fates:cache:invalidate"
+
+# Prefix of all shared (L2) cache keys in redis
+CACHE_KEY_PREFIX = "fates:cache:"
+
+# Shared cache key prefix (with the user ID appended) of a user's staff permission
+PERMS_CACHE_PREFIX = "perms:"
+
+
+def redis_from_config() -> aioredis.Redis:
+    """
+    Creates a redis client from the storage section of config.yaml
+    (with REDIS_HOST/REDIS_PORT as fallbacks). This does not connect
+    until the first command is sent
+    """
+    redis_cfg = config["storage"]["redis"]
+
+    return aioredis.from_url(
+        "redis://",
+        host=redis_cfg["host"] or os.getenv("REDIS_HOST") or "localhost",
+        port=redis_cfg["port"] or os.getenv("REDIS_PORT") or 6379,
+        db=redis_cfg["database"] or 0,
+        password=redis_cfg["password"] or None,
+    )
+
+
+async def invalidate_cache(redis: aioredis.Redis, key: str, *, origin: str):
+    """
+    Removes a shared cache key and tells every fates worker to drop its copy. This is
+    for services (like silverpelt) that change data fates caches
+    """
+    await redis.delete(CACHE_KEY_PREFIX + key)
+    await redis.publish(CACHE_INVALIDATE_CHANNEL, msgpack.packb([origin, key]))
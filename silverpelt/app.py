@@ -1,17 +1,23 @@
 import asyncio
-import os
 from typing import Any
 from fastapi import FastAPI
 from fastapi.responses import JSONResponse
 import msgpack
 import discord
 from ruamel.yaml import YAML
-import aioredis
 from pydantic import BaseModel
 
-from silverpelt.types.types import ChannelMessage, IDiscordUser, Status, check_snow
+from silverpelt.types.types import (
+    ChannelMessage,
+    IDiscordUser,
+    Status,
+    UserBatch,
+    check_snow,
+)
 
 from libcommon import config
+from libcommon.storage import PERMS_CACHE_PREFIX, invalidate_cache, redis_from_config
+from silverpelt.members import MemberIndex
 
 # We use messagepack for serialization
 class MsgpackResponse(JSONResponse):
@@ -29,26 +35,112 @@ app = FastAPI(default_response_class=MsgpackResponse)
 bot = discord.Client(intents=discord.Intents(guilds=True, members=True, presences=True))
 
 
+# Guilds each user is in, so fetch_user does not have to look through every guild
+member_index = MemberIndex()
+
+
+def get_member(id: int) -> discord.Member | None:
+    """Returns a member object of a user from any guild the bot is in"""
+    for guild_id in member_index.guilds_of(id):
+        if (guild := bot.get_guild(guild_id)) and (member := guild.get_member(id)):
+            return member
+
+    return None
+
+
 @bot.event
 async def on_ready():
     """When the bot is ready, inform the user via the console"""
     print("Connected to discord successfully!")
 
+    member_index.clear()
 
-# Construct redis URL
-redis_url = f"redis://"
+    for guild in bot.guilds:
+        await member_index.add_guild(guild)
+
+    print(f"Indexed {len(member_index)} members")
+
+
+@bot.event
+async def on_guild_join(guild: discord.Guild):
+    """Indexes the members of a new guild"""
+    await member_index.add_guild(guild)
+
+
+@bot.event
+async def on_guild_remove(guild: discord.Guild):
+    """Unindexes the members of a guild the bot left"""
+    await member_index.remove_guild(guild)
 
-redis = aioredis.from_url(
-    redis_url,
-    host=config["storage"]["redis"]["host"] or os.getenv("REDIS_HOST") or "localhost",
-    port=config["storage"]["redis"]["port"] or os.getenv("REDIS_PORT") or 6379,
-    db=config["storage"]["redis"]["database"] or 0,
-    password=config["storage"]["redis"]["password"] or None,
-)
 
+redis = redis_from_config()
+
+
+async def invalidate_perms(member: discord.Member):
+    """Drops the staff permission fates has cached for a member of the main server"""
+    if member.guild.id != int(config["servers"]["main"]):
+        return
+
+    try:
+        await invalidate_cache(
+            redis, f"{PERMS_CACHE_PREFIX}{member.id}", origin="silverpelt"
+        )
+    except Exception as exc:
+        print(f"Failed to invalidate permissions of {member.id}: {exc}")
+
+
+@bot.event
+async def on_member_update(before: discord.Member, after: discord.Member):
+    """Invalidates a member's permissions when their roles change"""
+    if before.roles != after.roles:
+        await invalidate_perms(after)
+
+
+@bot.event
+async def on_member_join(member: discord.Member):
+    """Indexes a new member and invalidates their permissions"""
+    member_index.add(member.id, member.guild.id)
+    await invalidate_perms(member)
+
+
+@bot.event
+async def on_member_remove(member: discord.Member):
+    """Unindexes a member that left and invalidates their permissions"""
+    member_index.remove(member.id, member.guild.id)
+    await invalidate_perms(member)
 
-async def cache(value: Any, *, key: str, expiry: int = 8 * 60 * 60) -> Any:
-    """Cache a value in redis (8 hours is default for expiry)"""
+
+silverpelt_cfg: dict[str, Any] = config.get("silverpelt") or {}
+
+
+def silverpelt_setting(key: str, default: int) -> int:
+    """
+    Returns an integer setting from the silverpelt section of config.yaml. Missing and
+    empty keys use the default, 0 is kept
+    """
+    value = silverpelt_cfg.get(key)
+    return int(value) if value is not None else default
+
+
+# How long fetched users are cached in redis (seconds)
+USER_CACHE_TTL = silverpelt_setting("user_cache_ttl", 8 * 60 * 60) or 8 * 60 * 60
+
+# How long users discord could not find are cached (seconds), 0 to not cache them
+USER_NEGATIVE_TTL = silverpelt_setting("negative_ttl", 60)
+
+# Cached users requested within this many seconds of their cache expiring are
+# refetched in the background, so hot users never expire. 0 disables this
+USER_REFRESH_AHEAD = silverpelt_setting("refresh_ahead", 60 * 60)
+
+# User ID -> the fetch in progress for them, so concurrent requests share one fetch
+user_fetches: dict[int, asyncio.Task] = {}
+
+# Refresh-ahead fetches in progress (kept here so they are not garbage collected)
+user_refreshes: set[asyncio.Task] = set()
+
+
+async def cache(value: Any, *, key: str, expiry: int = USER_CACHE_TTL) -> Any:
+    """Cache a value in redis (USER_CACHE_TTL is default for expiry)"""
     if isinstance(value, BaseModel):
         value = value.dict()
     await redis.set(key, msgpack.packb(value), ex=expiry)
@@ -78,51 +170,68 @@ async def about_me():
     )
 
 
-@app.get("/users/{id}")
-async def get_user(id: int):
-    """Get a user from discord"""
-
-    # An explanation on snowflakes
+async def fetch_user(id: int) -> dict | None:
     """
-    Joghurt
-
-    a 16 digit number would have been created before Jan 28th, 2015, and Discord started on May 13th, 2015.
-    So in practice IDs will have between 17 and 19 digits
+    Fetches a user and caches it. Concurrent calls for the same user share one fetch
+    (and one discord API request)
     """
-    if not check_snow(id):
-        return None
+    if not (task := user_fetches.get(id)):
+        task = asyncio.create_task(_fetch_user(id))
+        user_fetches[id] = task
+        task.add_done_callback(lambda _: user_fetches.pop(id, None))
 
-    # Check if in redis cache
-    user = await redis.get(f"user:{id}")
+    # A caller going away must not cancel the fetch for everyone else
+    return await asyncio.shield(task)
 
-    if user:
-        user_obj = msgpack.unpackb(user)
 
-        return IDiscordUser(**user_obj) if user_obj else None
-    print("Not in cache, fetching from discord")
+async def refresh_user(id: int):
+    """Refetches a cached user before their cache entry expires"""
+    try:
+        await fetch_user(id)
+    except Exception as exc:
+        print(f"Failed to refresh user {id}: {exc}")
+
+
+def refresh_ahead(id: int, ttl: int):
+    """Refetches a cached user in the background if their entry expires soon"""
+    if USER_REFRESH_AHEAD <= 0 or not 0 <= ttl <= USER_REFRESH_AHEAD:
+        return
+
+    if id in user_fetches:
+        return
+
+    task = asyncio.create_task(refresh_user(id))
+    user_refreshes.add(task)
+    task.add_done_callback(user_refreshes.discard)
+
+
+async def _fetch_user(id: int) -> dict | None:
+    """Fetches a user from discord (dpy cache first, then the API) and caches it"""
     await bot.wait_until_ready()
 
-    # Check if in dpy cache
-    for guild in bot.guilds:
-        print(guild)
-        if user := guild.get_member(id):
-            return await cache(
-                IDiscordUser(
-                    id=user.id,
-                    username=user.name,
-                    disc=user.discriminator,
-                    avatar=user.avatar.url if user.avatar else user.default_avatar.url,
-                    bot=user.bot,
-                    system=user.system,
-                    status=Status.new(user.status.value),
-                    flags=user.public_flags.value,
-                ),
-                key=f"user:{id}",
-            )
+    # Check if in dpy cache (members have a status, users we share no guild with do not)
+    if user := get_member(id) or bot.get_user(id):
+        if isinstance(user, discord.Member):
+            status = Status.new(user.status.value)
+        else:
+            status = Status.offline
+
+        return await cache(
+            IDiscordUser(
+                id=user.id,
+                username=user.name,
+                disc=user.discriminator,
+                avatar=user.avatar.url if user.avatar else user.default_avatar.url,
+                bot=user.bot,
+                system=user.system,
+                status=status,
+                flags=user.public_flags.value,
+            ),
+            key=f"user:{id}",
+        )
 
     # Fetch from API
     try:
-        print("fetching")
         user = await bot.fetch_user(id)
         return await cache(
             IDiscordUser(
@@ -137,12 +246,85 @@ async def get_user(id: int):
             ),
             key=f"user:{id}",
         )
+    except discord.NotFound:
+        if USER_NEGATIVE_TTL > 0:
+            await cache(None, key=f"user:{id}", expiry=USER_NEGATIVE_TTL)
+        return None
     except Exception as exc:
+        # Not cached, this may be temporary
         print(exc)
-        await cache(None, key=f"user:{id}", expiry=60)
         return None
 
 
+@app.get("/users/{id}")
+async def get_user(id: int):
+    """Get a user from discord"""
+
+    # An explanation on snowflakes
+    """
+    Joghurt
+
+    a 16 digit number would have been created before Jan 28th, 2015, and Discord started on May 13th, 2015.
+    So in practice IDs will have between 17 and 19 digits
+    """
+    if not check_snow(id):
+        return None
+
+    # Check if in redis cache
+    async with redis.pipeline(transaction=False) as pipe:
+        user, ttl = await pipe.get(f"user:{id}").ttl(f"user:{id}").execute()
+
+    if user:
+        user_obj = msgpack.unpackb(user)
+
+        if not user_obj:
+            return None
+
+        refresh_ahead(id, ttl)
+        return IDiscordUser(**user_obj)
+
+    return await fetch_user(id)
+
+
+@app.post("/users/batch")
+async def get_users_batch(data: UserBatch):
+    """
+    Get many users from discord in one request. Returns a list in the same order as ``ids``
+    with ``None`` for users that could not be found
+    """
+    users: list[dict | None] = [None] * len(data.ids)
+
+    valid = [(i, id) for i, id in enumerate(data.ids) if check_snow(id)]
+
+    if not valid:
+        return users
+
+    # One round trip for all cache hits (and how long they have left)
+    async with redis.pipeline(transaction=False) as pipe:
+        for _, id in valid:
+            pipe.get(f"user:{id}").ttl(f"user:{id}")
+
+        cached = await pipe.execute()
+
+    misses: list[tuple[int, int]] = []
+
+    for (i, id), user, ttl in zip(valid, cached[::2], cached[1::2]):
+        if user:
+            users[i] = msgpack.unpackb(user)
+
+            if users[i]:
+                refresh_ahead(id, ttl)
+        else:
+            misses.append((i, id))
+
+    fetched = await asyncio.gather(*[fetch_user(id) for _, id in misses])
+
+    for (i, _), user in zip(misses, fetched):
+        users[i] = user
+
+    return users
+
+
 @app.get("/roles/{gid}/{uid}")
 async def get_guild_member_roles(gid: int, uid: int):
     """Get a user's roles from a guild"""
@@ -0,0 +1,92 @@
+"""
+Microbenchmark of the member index against the old per-guild scan, using mock guilds
+(no discord connection needed)
+
+Run with ``python3 -m silverpelt.bench_members [guilds] [members per guild]``
+"""
+import asyncio
+import random
+import sys
+import time
+from types import SimpleNamespace
+
+from silverpelt.members import MemberIndex
+
+
+def make_guilds(count: int, members: int) -> list[SimpleNamespace]:
+    """Creates mock guilds (with ``get_member``) whose members overlap a bit"""
+    guilds = []
+
+    for guild_id in range(count):
+        ids = {random.randrange(count * members) for _ in range(members)}
+        guild = SimpleNamespace(
+            id=guild_id, members=[SimpleNamespace(id=id) for id in ids], ids=ids
+        )
+        guild.get_member = lambda id, guild=guild: id if id in guild.ids else None
+        guilds.append(guild)
+
+    return guilds
+
+
+def timed(name: str, fn, runs: int):
+    """Runs ``fn`` ``runs`` times and prints the time per run"""
+    start = time.perf_counter()
+
+    for _ in range(runs):
+        fn()
+
+    print(f"{name}: {(time.perf_counter() - start) / runs * 1e6:.2f}us")
+
+
+async def main(count: int, members: int):
+    """Benchmarks lookups, leaves and guild removals"""
+    guilds = make_guilds(count, members)
+
+    # Random members can be in any guild, so a user outside their range is added to the
+    # last guild only. This is the worst case for the scan
+    user_id = count * members
+    guilds[-1].ids.add(user_id)
+    guilds[-1].members.append(SimpleNamespace(id=user_id))
+
+    by_id = {guild.id: guild for guild in guilds}
+    index = MemberIndex()
+
+    start = time.perf_counter()
+    for guild in guilds:
+        await index.add_guild(guild)
+    print(f"index {count} guilds: {(time.perf_counter() - start) * 1e3:.2f}ms")
+
+    def scan():
+        """Old lookup: every guild until one has the member"""
+        for guild in guilds:
+            if guild.get_member(user_id):
+                return guild
+
+    def lookup():
+        """New lookup: only the guilds the user is in"""
+        for guild_id in index.guilds_of(user_id):
+            if by_id[guild_id].get_member(user_id):
+                return by_id[guild_id]
+
+    timed("scan lookup", scan, 1000)
+    timed("index lookup", lookup, 100000)
+    timed(
+        "member leave+join",
+        lambda: (index.remove(user_id, 0), index.add(user_id, 0)),
+        100000,
+    )
+
+    start = time.perf_counter()
+    await index.remove_guild(guilds[0])
+    print(
+        f"remove guild of {members} members: {(time.perf_counter() - start) * 1e3:.2f}ms"
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(
+        main(
+            int(sys.argv[1]) if len(sys.argv) > 1 else 5000,
+            int(sys.argv[2]) if len(sys.argv) > 2 else 100,
+        )
+    )
@@ -0,0 +1,62 @@
+"""
+User ID -> guild index for the members the bot can see, so looking up a cached member
+does not have to go through every guild. This is kept free of discord.py (guilds only
+need ``id`` and ``members``) so it can be benchmarked with mock guilds
+"""
+import asyncio
+from typing import Any, Iterator
+
+# Members handled between yields to the event loop when (un)indexing a whole guild
+INDEX_BATCH = 10000
+
+
+class MemberIndex:
+    """Maps user IDs to the IDs of every guild they are a member of"""
+
+    def __init__(self):
+        self.guilds: dict[int, set[int]] = {}
+
+    def __len__(self) -> int:
+        """Returns the number of indexed users"""
+        return len(self.guilds)
+
+    def add(self, user_id: int, guild_id: int):
+        """Indexes a member of a guild"""
+        if (guilds := self.guilds.get(user_id)) is None:
+            self.guilds[user_id] = {guild_id}
+        else:
+            guilds.add(guild_id)
+
+    def remove(self, user_id: int, guild_id: int):
+        """Unindexes a member of a guild"""
+        if (guilds := self.guilds.get(user_id)) is None:
+            return
+
+        guilds.discard(guild_id)
+
+        if not guilds:
+            del self.guilds[user_id]
+
+    def guilds_of(self, user_id: int) -> Iterator[int]:
+        """Returns the IDs of the guilds a user is in"""
+        return iter(self.guilds.get(user_id, ()))
+
+    async def add_guild(self, guild: Any):
+        """Indexes every member of a guild, yielding to the event loop between batches"""
+        for i, member in enumerate(guild.members):
+            self.add(member.id, guild.id)
+
+            if i % INDEX_BATCH == INDEX_BATCH - 1:
+                await asyncio.sleep(0)
+
+    async def remove_guild(self, guild: Any):
+        """Unindexes every member of a guild, yielding to the event loop between batches"""
+        for i, member in enumerate(guild.members):
+            self.remove(member.id, guild.id)
+
+            if i % INDEX_BATCH == INDEX_BATCH - 1:
+                await asyncio.sleep(0)
+
+    def clear(self):
+        """Drops every indexed member"""
+        self.guilds.clear()
@@ -1,5 +1,5 @@
 import enum
-from pydantic import BaseModel, root_validator
+from pydantic import BaseModel, root_validator, validator
 
 
 class Status(enum.IntEnum):
@@ -49,6 +49,19 @@ def check_snow(id: int) -> bool:
     return len(str(id)) >= 17 and len(str(id)) <= 20
 
 
+class UserBatch(BaseModel):
+    """Represents a batch of user IDs to resolve in one request"""
+
+    ids: list[int]
+
+    @validator("ids")
+    def ensure_batch_size(cls, v: list[int]):
+        """Ensures that the batch is not too large"""
+        if len(v) > 100:
+            raise ValueError("Cannot resolve more than 100 users at once")
+        return v
+
+
 class ChannelMessage(BaseModel):
     """Represents a channel message that is sent to the client"""
 